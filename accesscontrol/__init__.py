@@ -0,0 +1,4 @@
+from .accesscontrol import AccessControl
+
+async def setup(bot):
+    await bot.add_cog(AccessControl(bot))
@@ -0,0 +1,34 @@
+from redbot.core import commands
+from redbot.core.bot import Red
+
+
+class AccessControl(commands.Cog):
+    """Shared in-memory allow lists for the team, bapp and global ban checks.
+
+    Each cog registers the set behind its list with `register(name, user_ids)`
+    and keeps updating that same set, so `is_allowed` is a set lookup that
+    never touches Config. Cogs reach it through `bot.get_cog("AccessControl")`
+    and register again from `on_cog_add` when it loads after them.
+    """
+
+    def __init__(self, bot: Red):
+        self.bot = bot
+        self.lists = {}  # list name -> set of user IDs, owned by the registering cog
+
+    def register(self, name: str, user_ids):
+        self.lists[name] = user_ids
+
+    def unregister(self, name: str):
+        self.lists.pop(name, None)
+
+    def is_allowed(self, user_id: int, name: str) -> bool:
+        """Whether the user is on the named list. Unknown lists allow nobody."""
+        return user_id in self.lists.get(name, ())
+
+    @commands.command()
+    @commands.is_owner()
+    async def accesslists(self, ctx):
+        """Show the registered allow lists and their sizes."""
+        if not self.lists:
+            return await ctx.send("No allow lists registered.")
+        await ctx.send("\n".join(f"**{name}**: {len(ids)} users" for name, ids in sorted(self.lists.items())))
@@ -0,0 +1,4 @@
+from .appcommandsync import AppCommandSync
+
+async def setup(bot):
+    await bot.add_cog(AppCommandSync(bot))
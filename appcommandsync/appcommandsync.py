@@ -0,0 +1,50 @@
+import asyncio
+import hashlib
+import json
+import logging
+
+from discord import app_commands
+from redbot.core import Config, commands
+from redbot.core.bot import Red
+
+log = logging.getLogger("red.appcommandsync")
+
+# Same Config namespace the cogs shared before this cog owned it, so the saved signatures carry over.
+SYNC_STATE_ID = 482917356
+
+
+def command_signature(tree: app_commands.CommandTree, command) -> str:
+    """Stable hash of the payload Discord receives for an app command."""
+    payload = json.dumps(command.to_dict(tree), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AppCommandSync(commands.Cog):
+    """Sync app commands to Discord only when their signatures changed.
+
+    Cogs with slash commands call `sync(commands)` through
+    `bot.get_cog("AppCommandSync")`. This cog alone keeps the signatures of
+    the tree Discord last received, so every cog compares against the same
+    state instead of clobbering each other's.
+    """
+
+    def __init__(self, bot: Red):
+        self.bot = bot
+        self.tree = bot.tree
+        self.config = Config.get_conf(self, identifier=SYNC_STATE_ID, force_registration=True)
+        self.config.register_global(synced={})  # command name -> signature hash last synced
+        self.lock = asyncio.Lock()
+
+    async def sync(self, own) -> bool:
+        """Add the commands to the tree and sync it if any of them changed. Returns True if it synced."""
+        for command in own:
+            self.tree.add_command(command, override=True)
+        async with self.lock, self.config.synced() as synced:
+            if all(synced.get(c.name) == command_signature(self.tree, c) for c in own):
+                return False
+            await self.tree.sync()
+            # The sync replaced everything Discord had with the whole tree.
+            synced.clear()
+            synced.update({c.name: command_signature(self.tree, c) for c in self.tree.get_commands()})
+        log.info(f"Synced app commands for {', '.join(c.name for c in own)}.")
+        return True
@@ -15,6 +15,27 @@ class bapprole(commands.Cog):
         self.bot = bot
         self.config = Config.get_conf(self, identifier=78631109)
         self.config.register_global(bapp_users=[])
+        self.bapp_ids = set()  # in-memory copy of bapp_users, written through by add/remove/wipe
+
+    async def cog_load(self):
+        self.bapp_ids = set(await self.config.bapp_users())
+        self.register_access()
+
+    def cog_unload(self):
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            access.unregister("bapp")
+
+    def register_access(self):
+        """Share the bapp list with AccessControl, which runs the membership check"""
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            access.register("bapp", self.bapp_ids)
+
+    @commands.Cog.listener()
+    async def on_cog_add(self, cog):
+        if cog.qualified_name == "AccessControl":
+            self.register_access()
 
     async def red_delete_data_for_user(self, **kwargs):
         """No data to delete"""
@@ -28,8 +49,56 @@ class bapprole(commands.Cog):
         """Check if user is owner or in bapp list"""
         if await self.bot_owner_check(ctx):
             return True
-        bapp_users = await self.config.bapp_users()
-        return ctx.author.id in bapp_users
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            return access.is_allowed(ctx.author.id, "bapp")
+        return ctx.author.id in self.bapp_ids
+
+    async def sync_member(self, member, users):
+        """Grant or revoke the bapp role so it matches the bapp list for one member"""
+        role = discord.utils.get(member.guild.roles, name=self.role_name)
+        if not role or (role in member.roles) == (member.id in users):
+            return
+        try:
+            if member.id in users:
+                await member.add_roles(role, reason="bapp list sync")
+            else:
+                await member.remove_roles(role, reason="bapp list sync")
+        except discord.HTTPException:
+            pass
+
+    async def sync_guild(self, guild, users):
+        """Sync only the members whose bapp role doesn't match the bapp list"""
+        role = discord.utils.get(guild.roles, name=self.role_name)
+        if not role:
+            return False
+        current_members = {m.id for m in role.members}
+        for uid in current_members ^ set(users):
+            member = guild.get_member(uid)
+            if member:
+                await self.sync_member(member, users)
+        return True
+
+    async def sync_user(self, user_id):
+        """Sync one user's bapp role in every server they share with the bot"""
+        for guild in self.bot.guilds:
+            member = guild.get_member(user_id)
+            if member:
+                await self.sync_member(member, self.bapp_ids)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        await self.sync_member(member, self.bapp_ids)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.sync_guild(guild, self.bapp_ids)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        # Only react when someone else gave or took the bapp role
+        if any(r.name == self.role_name for r in set(before.roles) ^ set(after.roles)):
+            await self.sync_member(after, self.bapp_ids)
 
     @commands.group()
     @commands.check(lambda ctx: ctx.cog.bapp_member_check(ctx))
@@ -68,22 +137,24 @@ class bapprole(commands.Cog):
     async def add(self, ctx, user: discord.User):
         """Add user to the bapp list"""
         async with self.config.bapp_users() as users:
-            if user.id not in users:
-                users.append(user.id)
-                await ctx.send(f"Added {user.mention} to bapp list")
-            else:
-                await ctx.send("User already in bapp list")
+            if user.id in users:
+                return await ctx.send("User already in bapp list")
+            users.append(user.id)
+        self.bapp_ids.add(user.id)
+        await self.sync_user(user.id)
+        await ctx.send(f"Added {user.mention} to bapp list")
 
     @bapp.command()
     @commands.is_owner()
     async def remove(self, ctx, user: discord.User):
         """Remove user from the bapp list"""
         async with self.config.bapp_users() as users:
-            if user.id in users:
-                users.remove(user.id)
-                await ctx.send(f"Removed {user.mention} from bapp list")
-            else:
-                await ctx.send("User not in bapp list")
+            if user.id not in users:
+                return await ctx.send("User not in bapp list")
+            users.remove(user.id)
+        self.bapp_ids.discard(user.id)
+        await self.sync_user(user.id)
+        await ctx.send(f"Removed {user.mention} from bapp list")
 
     @bapp.command()  
     @commands.is_owner()
@@ -108,6 +179,7 @@ class bapprole(commands.Cog):
              if pred.result == 0:  
                  await ctx.send("Wiping all data...")  
                  await self.config.bapp_users.set([])  
+                 self.bapp_ids.clear()
                  
                  deleted = 0  
                  for guild in self.bot.guilds:  
@@ -161,43 +233,24 @@ class bapprole(commands.Cog):
     @bapp.command()
     @commands.check(lambda ctx: ctx.cog.bapp_member_check(ctx))
     async def update(self, ctx):
-        """Update bapp roles across all servers"""  
-        bapp_users = await self.config.bapp_users()  
-        msg = await ctx.send("Starting global role update...")  
-        
-        success = errors = 0  
-        for guild in self.bot.guilds:  
-            try:  
-                role = discord.utils.get(guild.roles, name=self.role_name)  
-                if not role:  
-                    errors += 1  
-                    continue  
-                
-
-
-                # Get all roles to sort  
-                roles = guild.roles  
-                
-                
-                # Sync members  
-                current_members = {m.id for m in role.members}  
-                to_remove = current_members - set(bapp_users)  
-                to_add = set(bapp_users) - current_members  
-                
-                for uid in to_remove:  
-                    member = guild.get_member(uid)  
-                    if member:  
-                        await member.remove_roles(role)  
-                
-                for uid in to_add:  
-                    member = guild.get_member(uid)  
-                    if member:  
-                        await member.add_roles(role)  
-                
-                success += 1  
-            except:  
-                errors += 1  
-        
+        """Reconcile bapp roles across all servers
+
+        The listeners keep membership in sync as things happen, so this is only
+        needed occasionally, e.g. after downtime.
+        """
+        bapp_users = await self.config.bapp_users()
+        msg = await ctx.send("Starting global role update...")
+
+        success = errors = 0
+        for guild in self.bot.guilds:
+            try:
+                if await self.sync_guild(guild, bapp_users):
+                    success += 1
+                else:
+                    errors += 1
+            except:
+                errors += 1
+
         await msg.edit(content=f"Updated {success} servers. Errors: {errors}")  
 
 
@@ -0,0 +1,83 @@
+"""Compare BanIndex with the plain ban_list dict.
+
+Run from the repository root:
+
+    python globalban/benchmark.py [sizes...]
+
+Reports traced memory and the mean lookup latency (half hits, half misses)
+for each size. Defaults to 10k, 100k and 1M entries.
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from index import BanIndex
+
+REASONS = ["No reason provided", "Spam", "Raid", "Scam links", "Alt account"]
+MODERATORS = ["Unknown", 1174820638997872721, 1274438209715044415, 690239097150767153]
+LOOKUPS = 200_000
+
+
+def make_rows(size, rng):
+    user_ids = set()
+    while len(user_ids) < size:
+        user_ids.add(rng.randrange(10**17, 2**62))
+    return [(user_id, rng.randrange(len(REASONS)), rng.choice(MODERATORS)) for user_id in user_ids]
+
+
+def build_ban_list(rows):
+    # Fresh strings per entry, the way JSON decoding of the Config blob does.
+    return {"%d" % user_id: {"reason": "%s" % REASONS[reason], "banned_by": moderator}
+            for user_id, reason, moderator in rows}
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def lookup_latency(contains, keys):
+    start = time.perf_counter()
+    for key in keys:
+        contains(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+
+def run(size):
+    rng = random.Random(size)
+    rows = make_rows(size, rng)
+    as_dict, dict_bytes = measure(lambda: build_ban_list(rows))
+    index, index_bytes = measure(lambda: BanIndex.from_dict(build_ban_list(rows)))
+    del rows
+
+    hits = [int(uid) for uid in rng.sample(list(as_dict), min(LOOKUPS // 2, size))]
+    misses = [rng.randrange(10**17, 2**62) for _ in range(len(hits))]
+    ids = hits + misses
+    rng.shuffle(ids)
+    str_ids = [str(uid) for uid in ids]
+
+    dict_ns = lookup_latency(as_dict.__contains__, str_ids)
+    index_ns = lookup_latency(index.__contains__, ids)
+    assert index.to_dict().keys() == as_dict.keys()
+
+    print(
+        f"{size:>9,} | dict {dict_bytes / 2**20:8.1f} MiB {dict_ns:7.0f} ns"
+        f" | index {index_bytes / 2**20:8.1f} MiB {index_ns:7.0f} ns"
+    )
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [10_000, 100_000, 1_000_000]
+    print("  entries |      dict memory / lookup |     index memory / lookup")
+    for size in sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,98 @@
+import csv
+import gzip
+import io
+import json
+
+import discord
+
+EXPORT_FORMATS = ("csv", "jsonl", "csv.gz", "jsonl.gz")
+PAGE_SIZE = 20
+
+
+def _write_csv(rows, stream):
+    writer = csv.writer(stream)
+    writer.writerow(["user_id", "reason", "banned_by", "banned_at"])
+    for user_id, entry in rows:
+        writer.writerow([user_id, entry["reason"], entry["banned_by"], entry.get("banned_at", "")])
+
+
+def _write_jsonl(rows, stream):
+    for user_id, entry in rows:
+        stream.write(json.dumps({"user_id": str(user_id), **entry}))
+        stream.write("\n")
+
+
+def export_ban_list(index, fmt):
+    """Write the index row by row into an in-memory file for `discord.File`.
+
+    Returns (buffer, filename). Nothing is written to disk.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    buffer = io.BytesIO()
+    compress = fmt.endswith(".gz")
+    raw = gzip.GzipFile(fileobj=buffer, mode="wb") if compress else buffer
+    stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = _write_csv if fmt.startswith("csv") else _write_jsonl
+    writer(index.items(), stream)
+    stream.flush()
+    stream.detach()
+    if compress:
+        raw.close()  # Writes the gzip trailer; the BytesIO stays open
+    buffer.seek(0)
+    return buffer, f"globalbanlist.{fmt}"
+
+
+class BanListPaginator(discord.ui.View):
+    """Browse the ban list one page at a time, rendering only the page shown."""
+
+    def __init__(self, index, author, timeout=180):
+        super().__init__(timeout=timeout)
+        self.index = index
+        self.author = author
+        self.page = 0
+        self.message = None
+
+    @property
+    def page_count(self):
+        return max(1, -(-len(self.index) // PAGE_SIZE))
+
+    def render(self):
+        self.page = min(self.page, self.page_count - 1)
+        start = self.page * PAGE_SIZE
+        lines = [
+            f"{user_id}: {entry['reason'][:150]}".replace("`", "'")
+            for user_id, entry in self.index.items(start, start + PAGE_SIZE)
+        ]
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+        embed = discord.Embed(
+            title="Global ban list",
+            description="```\n" + ("\n".join(lines) or "Empty") + "\n```",
+            color=discord.Color.red(),
+        )
+        embed.set_footer(text=f"Page {self.page + 1}/{self.page_count} • {len(self.index)} bans")
+        return embed
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("This list belongs to someone else.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        self.page += 1
+        await interaction.response.edit_message(embed=self.render(), view=self)
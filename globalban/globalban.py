@@ -1,81 +1,371 @@
 import discord
 from redbot.core import commands, Config
+from redbot.core.data_manager import cog_data_path
+from redbot.core.utils.chat_formatting import box, pagify
 import asyncio
 import logging
+import os
+import socket
+import time
+
+from .export import EXPORT_FORMATS, BanListPaginator, export_ban_list
+from .importer import parse_ban_file, parse_user_id
+from .index import BanIndex
+from . import replication
+from .partition import PartitionCoordinator
+from .scheduler import JobScheduler
+from .storage import BanStore
 
 log = logging.getLogger("red.globalban")
 
+BULK_BAN_SIZE = 200  # Discord's maximum users per bulk ban request
+BAN_PAGE_SIZE = 1000  # Discord's maximum ban entries per page
+REBUILD_CONCURRENCY = 4
+UNBAN_CONCURRENCY = 4
+UNBAN_READ_THRESHOLD = 50  # above this many IDs, read a guild's bans once instead of probing each ID
+JOURNAL_FLUSH_DELAY = 5  # seconds to batch ban events before writing
+JOURNAL_LOOKUP_CONCURRENCY = 5  # ban lookups in flight while applying the journal
+RECONCILE_INTERVAL = 604800  # 7 days
+SYNC_INTERVAL = 43200  # 12 hours
+ATTRIBUTION_INTERVAL = 86400  # 24 hours
+PARTITION_LEASE = 300  # seconds before a silent process loses its guilds
+REMOVAL_RETENTION = 2592000  # 30 days a removal is kept for peers to pull
+
 class GlobalBan(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config = Config.get_conf(self, identifier=1234567890, force_registration=True)
-        self.config.register_global(ban_list={})
-        self.ban_update_task = self.bot.loop.create_task(self.ban_update_loop())
-        self.ban_sync_task = self.bot.loop.create_task(self.ban_sync_loop())
-    
-    async def ban_update_loop(self):
+        # ban_list is only read once, to migrate it into the SQLite store
+        self.config.register_global(
+            ban_list={}, ban_journal=[], auto_sync=True,
+            replication_dir=None, replication_name=None, job_state={},
+            partition_enabled=False,
+        )
+        self.config.register_guild(rebuild_after=None, rebuild_done=False, rebuild_bans={}, audit_cursor=None)
+        self.store = BanStore(cog_data_path(self) / "bans.sqlite3")
+        self.ban_list_lock = asyncio.Lock()
+        self.journal_event = asyncio.Event()
+        self.index = BanIndex()  # In-memory copy of the store for join checks and exports
+        self.journaled_ids = set()  # IDs changed by events since the last reconciliation
+        self.ban_queue = asyncio.Queue()  # (user IDs, reason) batches waiting to be banned everywhere
+        self.scheduler = JobScheduler(bot, self.config.job_state)
+        self.scheduler.add("reconcile", RECONCILE_INTERVAL, self.rebuild_ban_list)
+        self.scheduler.add("sync", SYNC_INTERVAL, self.sync_bans, enabled=self.config.auto_sync)
+        self.scheduler.add("attribute", ATTRIBUTION_INTERVAL, self.attribute_bans)
+        self.partition = None  # Set when guild work is split between processes
+        self.store_version = None
+        self.journal_task = None
+        self.fanout_task = None
+        self.partition_task = None
+
+    async def cog_load(self):
+        await self.store.open()
+        migrated = await self.store.migrate(await self.config.ban_list())
+        if migrated is not None:
+            await self.config.ban_list.clear()
+            log.info(f"Migrated {migrated} global bans from Config to SQLite.")
+        self.index = BanIndex.from_dict(await self.store.all())
+        # Background work only starts once the store is open.
+        self.journal_task = asyncio.create_task(self.journal_loop())
+        self.fanout_task = asyncio.create_task(self.ban_fanout_loop())
+        if await self.config.partition_enabled():
+            await self.start_partition()
+        self.scheduler.start()
+
+    async def cog_unload(self):
+        for task in (self.journal_task, self.fanout_task, self.partition_task):
+            if task is not None:
+                task.cancel()
+        self.scheduler.stop()
+        if self.partition is not None:
+            await self.partition.close()
+        await self.store.close()
+
+    async def start_partition(self):
+        self.partition = PartitionCoordinator(
+            self.store.path, f"{socket.gethostname()}:{os.getpid()}", lease=PARTITION_LEASE
+        )
+        await self.partition.open()
+        self.store_version = await self.store.data_version()
+        self.partition_task = asyncio.create_task(self.partition_loop())
+
+    async def stop_partition(self):
+        self.partition_task.cancel()
+        await self.partition.close()
+        self.partition = self.partition_task = None
+
+    async def partition_loop(self):
+        """Keep this process's guild claims alive and pick up other processes' writes."""
         await self.bot.wait_until_ready()
         while True:
-            log.info("Starting 6-hour global ban list update...")
-            await self.globalbanupdatelist(None)
-            log.info("Global ban list update complete. Next update in 6 hours.")
-            await asyncio.sleep(21600)  # 6 hours
-    
-    async def ban_sync_loop(self):
+            try:
+                await self.partition.heartbeat(guild.id for guild in self.bot.guilds)
+                version = await self.store.data_version()
+                if version != self.store_version:
+                    self.store_version = version
+                    async with self.ban_list_lock:
+                        self.index = BanIndex.from_dict(await self.store.all())
+            except Exception:
+                log.exception("Partition heartbeat failed")
+            await asyncio.sleep(PARTITION_LEASE / 3)
+
+    def job_guilds(self):
+        """The guilds this process syncs and rebuilds: all of them, or its claimed slice."""
+        if self.partition is None:
+            return list(self.bot.guilds)
+        return [guild for guild in self.bot.guilds if guild.id in self.partition.owned]
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if member.id not in self.index:
+            return
+        try:
+            await member.guild.ban(member, reason="Global ban: joined while globally banned", delete_message_seconds=0)
+            log.info(f"Banned globally banned user {member} on join in {member.guild.name}")
+        except discord.HTTPException as e:
+            log.error(f"Failed to ban globally banned user {member} in {member.guild.name}: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild, user):
+        if user.id not in self.index:  # Our own sync and fan-out bans change nothing
+            await self.append_journal("ban", guild, user)
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild, user):
+        if user.id in self.index:
+            await self.append_journal("unban", guild, user)
+
+    async def append_journal(self, op, guild, user):
+        async with self.config.ban_journal() as journal:
+            journal.append({"op": op, "user_id": user.id, "guild_id": guild.id})
+        self.journal_event.set()
+
+    async def journal_loop(self):
         await self.bot.wait_until_ready()
+        if await self.config.ban_journal():
+            self.journal_event.set()  # Entries left over from before a restart
         while True:
-            log.info("Starting 12-hour global ban sync...")
-            await self.sync_bans()
-            log.info("Global ban sync complete. Next sync in 12 hours.")
-            await asyncio.sleep(43200)  # 12 hours
-    
-    async def sync_bans(self):
-        ban_list = await self.config.ban_list()
+            await self.journal_event.wait()
+            await asyncio.sleep(JOURNAL_FLUSH_DELAY)
+            self.journal_event.clear()
+            try:
+                await self.flush_journal()
+            except Exception:
+                log.exception("Failed to apply the ban journal")
+
+    async def flush_journal(self):
+        """Apply pending ban/unban events to the global list in one write.
+
+        The ban lookups run before the list lock is taken, at most
+        JOURNAL_LOOKUP_CONCURRENCY at a time, so other writers aren't held up.
+        """
+        journal = await self.config.ban_journal()
+        if not journal:
+            return
+        banned, unbanned = {}, {}  # user ID -> guild of the event
+        for entry in journal:
+            user_id = entry["user_id"]
+            self.journaled_ids.add(user_id)
+            if entry["op"] == "unban":
+                banned.pop(user_id, None)
+                unbanned[user_id] = entry["guild_id"]
+            else:
+                unbanned.pop(user_id, None)
+                if user_id not in self.index:
+                    banned.setdefault(user_id, entry["guild_id"])
+
+        semaphore = asyncio.Semaphore(JOURNAL_LOOKUP_CONCURRENCY)
+
+        async def new_entry(user_id, guild_id):
+            async with semaphore:
+                reason = await self.fetch_ban_reason(guild_id, user_id)
+            return user_id, {"reason": reason, "banned_by": "Unknown", "banned_at": time.time()}
+
+        async def lifted(user_id, guild_id):
+            async with semaphore:
+                return user_id, not await self.banned_elsewhere(user_id, guild_id)
+
+        # A local unban only lifts a scanned ban, and only once no other guild
+        # still bans the user; manual and imported bans need globalunban.
+        sources = await self.store.sources(unbanned)
+        added = dict(await asyncio.gather(*(new_entry(u, g) for u, g in banned.items())))
+        checks = await asyncio.gather(*(lifted(u, g) for u, g in unbanned.items() if sources.get(u) == "scan"))
+        removed = [user_id for user_id, gone in checks if gone]
+
+        async with self.ban_list_lock:
+            added_count, removed_count = await self.store.apply(added, removed, source="scan")
+            self.index.apply(added, removed)
+            async with self.config.ban_journal() as pending:
+                del pending[:len(journal)]  # Keep events that arrived while applying
+        if added_count or removed_count:
+            log.info(f"Ban journal applied: {added_count} added, {removed_count} removed.")
+
+    async def banned_elsewhere(self, user_id, guild_id):
+        """Whether any guild other than `guild_id` still bans the user.
+
+        Guilds whose bans can't be read are skipped. Synced guilds usually
+        answer on the first lookup.
+        """
         for guild in self.bot.guilds:
+            if guild.id == guild_id:
+                continue
+            try:
+                await guild.fetch_ban(discord.Object(id=user_id))
+                return True
+            except discord.HTTPException:  # NotFound: not banned there
+                continue
+        return False
+
+    async def fetch_ban_reason(self, guild_id, user_id):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return "No reason provided"
+        try:
+            ban_entry = await guild.fetch_ban(discord.Object(id=user_id))
+        except discord.HTTPException:
+            return "No reason provided"
+        return ban_entry.reason or "No reason provided"
+
+    async def ban_fanout_loop(self):
+        """Ban queued batches of users in every guild, one guild at a time."""
+        await self.bot.wait_until_ready()
+        while True:
+            user_ids, reason = await self.ban_queue.get()
+            for guild in self.bot.guilds:
+                banned, failed = await self.bulk_ban_missing(guild, user_ids, reason)
+                log.info(f"Queued bans applied in {guild.name}: {banned} banned, {failed} failed.")
+            self.ban_queue.task_done()
+
+    async def fetch_guild_ban_ids(self, guild):
+        """Read a guild's ban list once and return the banned user IDs."""
+        return {entry.user.id async for entry in guild.bans(limit=None)}
+
+    async def bulk_ban_missing(self, guild, user_ids, reason):
+        """Ban the given IDs in batches of BULK_BAN_SIZE. Returns (banned, failed)."""
+        banned = failed = 0
+        user_ids = list(user_ids)
+        for i in range(0, len(user_ids), BULK_BAN_SIZE):
+            batch = [discord.Object(id=uid) for uid in user_ids[i:i + BULK_BAN_SIZE]]
+            try:
+                result = await guild.bulk_ban(batch, reason=reason, delete_message_seconds=0)
+                banned += len(result.banned)
+                failed += len(result.failed)
+            except discord.Forbidden:
+                log.warning(f"No permission to ban in {guild.name}")
+                failed += len(user_ids) - i
+                break
+            except discord.HTTPException as e:
+                log.error(f"Error bulk banning in {guild.name}: {e}")
+                failed += len(batch)
+        return banned, failed
+
+    async def sync_bans(self):
+        """Ban every listed user that is missing from a guild's ban list.
+
+        Returns a dict of guild -> {"already", "banned", "failed"} counts.
+        """
+        wanted = set(self.index)
+        results = {}
+        for guild in self.job_guilds():
             log.info(f"Syncing bans for {guild.name}...")
-            count = 0
-            for user_id in ban_list.keys():
-                user = discord.Object(id=int(user_id))
-                try:
-                    await guild.ban(user, reason="Global ban sync")
-                    count += 1
-                    if count % 20 == 0:
-                        log.info(f"{count} bans synced in {guild.name}")
-                    await asyncio.sleep(1)  # Prevent rate limits
-                except discord.Forbidden:
-                    log.warning(f"No permission to ban in {guild.name}")
-                except discord.HTTPException as e:
-                    log.error(f"Error banning in {guild.name}: {e}")
-            log.info(f"All bans synced in {guild.name} ({count} total).")
+            try:
+                existing = await self.fetch_guild_ban_ids(guild)
+            except discord.HTTPException as e:
+                log.error(f"Error fetching bans from {guild.name}: {e}")
+                results[guild] = {"already": 0, "banned": 0, "failed": len(wanted)}
+                continue
+            missing = wanted - existing
+            banned, failed = await self.bulk_ban_missing(guild, missing, "Global ban sync")
+            results[guild] = {"already": len(wanted) - len(missing), "banned": banned, "failed": failed}
+            log.info(
+                f"Bans synced in {guild.name}: {results[guild]['already']} already banned, "
+                f"{banned} newly banned, {failed} failed."
+            )
+        return results
 
     @commands.command()
     async def bansync(self, ctx):
         """Manually sync global bans across all servers."""
-        await self.sync_bans()
+        if self.scheduler.is_running("sync"):
+            return await ctx.send("A ban sync is already running.")
+        async with ctx.typing():
+            results = await self.scheduler.run("sync")
+        lines = [
+            f"{guild.name}: {r['already']} already, {r['banned']} banned, {r['failed']} failed"
+            for guild, r in results.items()
+        ]
         await ctx.send("Ban sync complete.")
+        for page in pagify("\n".join(lines)):
+            await ctx.send(box(page))
     
+    @commands.command()
+    async def globalbanautosync(self, ctx, enabled: bool):
+        """Turn the 12-hour full ban sync on or off.
+
+        Globally banned users are still banned as soon as they join a server.
+        """
+        await self.config.auto_sync.set(enabled)
+        await ctx.send(f"Automatic global ban sync {'enabled' if enabled else 'disabled'}.")
+
+    @commands.command()
+    async def globalbanjobs(self, ctx):
+        """Show when the background ban jobs run next and how long they last took."""
+        lines = []
+        for name, running, next_run, last_run, duration in await self.scheduler.status():
+            status = "running now" if running else (f"next <t:{int(next_run)}:R>" if next_run else "not scheduled yet")
+            last = f"last <t:{int(last_run)}:R> took {duration:.0f}s" if last_run else "never run"
+            lines.append(f"**{name}**: {status}, {last}")
+        await ctx.send("\n".join(lines))
+
+    @commands.command()
+    @commands.is_owner()
+    async def globalbanpartition(self, ctx, enabled: bool = None):
+        """Split sync and rebuild work between bot processes sharing this data folder.
+
+        Without an argument, shows this process's share.
+        """
+        if enabled is not None:
+            await self.config.partition_enabled.set(enabled)
+            if enabled and self.partition is None:
+                await self.start_partition()
+            elif not enabled and self.partition is not None:
+                await self.stop_partition()
+        if self.partition is None:
+            return await ctx.send("Partitioning is off: this process handles every server.")
+        workers = await self.partition.heartbeat(guild.id for guild in self.bot.guilds)
+        await ctx.send(
+            f"Partitioning is on: {workers} live processes, this one handles "
+            f"{len(self.partition.owned)} of {len(self.bot.guilds)} servers."
+        )
+
     @commands.command()
     async def globaltotalbans(self, ctx):
         """Show total number of globally banned users."""
-        ban_list = await self.config.ban_list()
-        await ctx.send(f"{len(ban_list)} users have been globally banned.")
+        await ctx.send(f"{len(self.index)} users have been globally banned.")
     
     @commands.command()
-    async def globalbanlist(self, ctx):
-        """Send the global ban list."""
-        ban_list = await self.config.ban_list()
-        if not ban_list:
+    async def globalbanlist(self, ctx, fmt: str = None):
+        """Browse the global ban list, or export it as a file.
+
+        Formats: `csv`, `jsonl`, `csv.gz`, `jsonl.gz`.
+        """
+        if not len(self.index):
             await ctx.send("The global ban list is empty.")
             return
-        
-        content = "\n".join([f"{uid}: {data['reason']}" for uid, data in ban_list.items()])
-        if len(content) > 1500:
-            with open("globalbanlist.txt", "w") as f:
-                f.write(content)
-            await ctx.send("Global ban list is too large. Sending as a file.", file=discord.File("globalbanlist.txt"))
-        else:
-            await ctx.send(f"```{content}```")
-    
+
+        if fmt is None:
+            view = BanListPaginator(self.index, ctx.author)
+            view.message = await ctx.send(embed=view.render(), view=view)
+            return
+
+        fmt = fmt.lower()
+        if fmt not in EXPORT_FORMATS:
+            await ctx.send(f"Unknown format. Use one of: {', '.join(EXPORT_FORMATS)}.")
+            return
+        async with ctx.typing():
+            buffer, filename = await asyncio.to_thread(export_ban_list, self.index.snapshot(), fmt)
+        await ctx.send(f"Global ban list ({len(self.index)} entries).", file=discord.File(buffer, filename=filename))
+
     @commands.command()
     async def globalbanlistwipe(self, ctx):
         """Wipe the entire global ban list."""
@@ -91,52 +381,393 @@ class GlobalBan(commands.Cog):
             await ctx.send("Wipe request timed out.")
             return
         
-        await self.config.ban_list.set({})
+        async with self.ban_list_lock:
+            await self.store.clear()
+            self.index.clear()
         await ctx.send("Global ban list wiped.")
         log.info("Global ban list has been wiped.")
     
-    @commands.command()
-    async def globalbanupdatelist(self, ctx):
-        """Fetch all bans from all servers and update the global list."""
+    async def rebuild_guild_bans(self, guild):
+        """Page through a guild's bans, saving a checkpoint after every page.
+
+        Returns True once the guild has been read completely.
+        """
+        conf = self.config.guild(guild)
+        if await conf.rebuild_done():
+            return True
+        after = await conf.rebuild_after()
+        count = 0
+        while True:
+            kwargs = {"limit": BAN_PAGE_SIZE}
+            if after:
+                kwargs["after"] = discord.Object(id=after)
+            try:
+                page = [entry async for entry in guild.bans(**kwargs)]
+            except discord.Forbidden:
+                log.warning(f"No permission to read bans in {guild.name}, skipping.")
+                await conf.rebuild_done.set(True)
+                return True
+            except discord.HTTPException as e:
+                log.error(f"Error fetching bans from {guild.name}, will resume from {after}: {e}")
+                return False
+
+            if page:
+                async with conf.rebuild_bans() as staged:
+                    for entry in page:
+                        staged.setdefault(str(entry.user.id), entry.reason or "No reason provided")
+                after = max(entry.user.id for entry in page)
+                await conf.rebuild_after.set(after)
+                count += len(page)
+                log.info(f"Fetched {count} bans so far from {guild.name}.")
+            if len(page) < BAN_PAGE_SIZE:
+                break
+
+        await conf.rebuild_done.set(True)
+        log.info(f"Finished fetching bans from {guild.name}.")
+        return True
+
+    async def clear_rebuild_state(self):
+        for guild_id in await self.config.all_guilds():
+            conf = self.config.guild_from_id(guild_id)
+            await conf.rebuild_after.clear()
+            await conf.rebuild_done.clear()
+            await conf.rebuild_bans.clear()
+
+    async def rebuild_ban_list(self, restart=False):
+        """Reconcile the global list against every guild's bans.
+
+        Guilds are read concurrently and each one resumes from its last saved
+        page, so an interrupted rebuild continues where it stopped. Differences
+        are only applied once every guild has been read, and users changed by
+        ban events in the meantime are left to the journal.
+        Returns (total bans, guilds still incomplete).
+        """
+        if restart:
+            await self.clear_rebuild_state()
         log.info("Updating global ban list from the current servers...")
-        banned_users = {}
-        
-        for guild in self.bot.guilds:
-            log.info(f"Fetching bans from the server: {guild.name}")
+        semaphore = asyncio.Semaphore(REBUILD_CONCURRENCY)
+
+        async def worker(guild):
+            async with semaphore:
+                return await self.rebuild_guild_bans(guild)
+
+        guilds = self.job_guilds()
+        finished = await asyncio.gather(*(worker(guild) for guild in guilds))
+        incomplete = [guild for guild, done in zip(guilds, finished) if not done]
+        if incomplete:
+            log.warning(f"Ban list rebuild incomplete, {len(incomplete)} servers will resume next run.")
+            return None, incomplete
+
+        fetched = {}
+        for guild in guilds:
+            for user_id, reason in (await self.config.guild(guild).rebuild_bans()).items():
+                fetched.setdefault(int(user_id), reason)
+
+        async with self.ban_list_lock:
+            added = {
+                user_id: {"reason": reason, "banned_by": "Unknown"}
+                for user_id, reason in fetched.items()
+                if user_id not in self.index and user_id not in self.journaled_ids
+            }
+            # Only scanned entries disappear when no guild bans them any more;
+            # manual and imported bans stay until removed explicitly. A
+            # partitioned process only sees its own guilds, so it can't tell.
+            removed = [] if self.partition is not None else [
+                user_id for user_id in await self.store.ids(source="scan")
+                if user_id not in fetched and user_id not in self.journaled_ids
+            ]
+            added_count, removed_count = await self.store.apply(added, removed, source="scan")
+            self.index.apply(added, removed)
+            self.journaled_ids.clear()
+        await self.clear_rebuild_state()
+        log.info(
+            f"Reconciliation applied {added_count} additions and {removed_count} removals. "
+            f"Total bans: {len(self.index)}"
+        )
+        return len(self.index), []
+
+    async def read_ban_audit_log(self, guild):
+        """Read a guild's ban audit entries newer than its saved cursor in one sweep.
+
+        Returns {target ID: (moderator ID, timestamp)} and the newest entry ID
+        seen, which becomes the cursor once the results are stored.
+        """
+        cursor = await self.config.guild(guild).audit_cursor()
+        kwargs = {"limit": None, "action": discord.AuditLogAction.ban, "oldest_first": True}
+        if cursor:
+            kwargs["after"] = discord.Object(id=cursor)
+        found = {}
+        async for entry in guild.audit_logs(**kwargs):
+            cursor = max(cursor or 0, entry.id)
+            if entry.target is None or entry.user is None or entry.user.id == self.bot.user.id:
+                continue  # Bans issued by this bot carry no useful attribution
+            found[entry.target.id] = (entry.user.id, entry.created_at.timestamp())
+        return found, cursor
+
+    async def attribute_bans(self):
+        """Fill in who issued scanned bans from each guild's audit log.
+
+        Returns the number of list entries that gained a moderator.
+        """
+        semaphore = asyncio.Semaphore(REBUILD_CONCURRENCY)
+
+        async def worker(guild):
+            async with semaphore:
+                try:
+                    return guild, *await self.read_ban_audit_log(guild)
+                except discord.HTTPException as e:
+                    log.warning(f"Could not read the audit log of {guild.name}: {e}")
+                    return guild, {}, None
+
+        attributions, cursors = {}, {}
+        for guild, found, cursor in await asyncio.gather(*(worker(g) for g in self.job_guilds())):
+            attributions.update(found)
+            if cursor:
+                cursors[guild] = cursor
+
+        attributions = {
+            user_id: data for user_id, data in attributions.items()
+            if (self.index.get(user_id) or {}).get("banned_by") == "Unknown"
+        }
+        updated = 0
+        if attributions:
+            async with self.ban_list_lock:
+                updated = await self.store.attribute(attributions)
+                entries = {
+                    user_id: {**self.index.get(user_id), "banned_by": moderator, "banned_at": banned_at}
+                    for user_id, (moderator, banned_at) in attributions.items()
+                }
+                self.index.apply(entries, removed=list(entries))
+        # Only advance the cursors once the attributions are stored.
+        for guild, cursor in cursors.items():
+            await self.config.guild(guild).audit_cursor.set(cursor)
+        log.info(f"Attributed {updated} global bans from audit logs.")
+        return updated
+
+    @commands.command()
+    async def globalbanattribute(self, ctx):
+        """Fill in the moderator of scanned bans from the servers' audit logs."""
+        if self.scheduler.is_running("attribute"):
+            return await ctx.send("Attribution is already running.")
+        async with ctx.typing():
+            updated = await self.scheduler.run("attribute")
+        await ctx.send(f"{updated} bans attributed to a moderator.")
+
+    @commands.command()
+    async def globalbanupdatelist(self, ctx, restart: bool = False):
+        """Fetch all bans from all servers and update the global list.
+
+        An interrupted update resumes where it stopped; pass `True` to start over.
+        """
+        if self.scheduler.is_running("reconcile"):
+            return await ctx.send("A ban list update is already running.")
+        async with ctx.typing():
+            total, incomplete = await self.scheduler.run("reconcile", restart=restart)
+        if incomplete:
+            names = ", ".join(guild.name for guild in incomplete)
+            await ctx.send(f"Could not finish fetching bans from: {names}. Run the command again to resume.")
+        else:
+            await ctx.send(f"Global ban list updated. {total} bans recorded.")
+
+    @commands.command()
+    @commands.is_owner()
+    async def globalbanimport(self, ctx, *, reason="Imported ban list"):
+        """Import a ban list from an attached file.
+
+        Accepts plain text (one ID per line, optionally followed by a reason),
+        CSV, JSON or JSONL. New users are added in one write and then banned
+        in every server in the background.
+        """
+        if not ctx.message.attachments:
+            await ctx.send("Attach a .txt, .csv, .json or .jsonl file with the IDs to import.")
+            return
+        attachment = ctx.message.attachments[0]
+        data = await attachment.read()
+
+        added, skipped, invalid = {}, 0, 0
+        now = time.time()
+        try:
+            for user_id, entry_reason in parse_ban_file(data, attachment.filename):
+                if user_id is None:
+                    invalid += 1
+                elif user_id in self.index or user_id in added:
+                    skipped += 1
+                else:
+                    added[user_id] = {"reason": entry_reason or reason, "banned_by": ctx.author.id, "banned_at": now}
+        except ValueError as e:  # Includes malformed JSON
+            await ctx.send(f"Could not read {attachment.filename}: {e}")
+            return
+
+        if added:
+            async with self.ban_list_lock:
+                await self.store.apply(added, source="import")
+                self.index.apply(added)
+            self.queue_bans(added, f"Global ban: {reason}")
+
+        await ctx.send(
+            f"Import finished: {len(added)} added, {skipped} skipped (already listed or duplicate), "
+            f"{invalid} invalid. {'Bans are being applied in the background.' if added else ''}"
+        )
+        log.info(f"{ctx.author} imported {len(added)} global bans from {attachment.filename}")
+
+    def queue_bans(self, user_ids, reason):
+        user_ids = list(user_ids)
+        for i in range(0, len(user_ids), BULK_BAN_SIZE):
+            self.ban_queue.put_nowait((user_ids[i:i + BULK_BAN_SIZE], reason))
+
+    async def replication_target(self):
+        root = await self.config.replication_dir()
+        name = await self.config.replication_name() or str(self.bot.user.id)
+        return root, name
+
+    @commands.group()
+    @commands.is_owner()
+    async def globalbanrepl(self, ctx):
+        """Share the global ban list with other bot instances through a directory."""
+
+    @globalbanrepl.command(name="dir")
+    async def globalbanrepl_dir(self, ctx, path: str, name: str = None):
+        """Set the shared directory and, optionally, this instance's name in it."""
+        await self.config.replication_dir.set(path)
+        await self.config.replication_name.set(name)
+        root, name = await self.replication_target()
+        await ctx.send(f"Publishing to `{root}` as `{name}`.")
+
+    @globalbanrepl.command(name="publish")
+    async def globalbanrepl_publish(self, ctx):
+        """Write this instance's snapshot, rewriting only the buckets that changed."""
+        root, name = await self.replication_target()
+        if not root:
+            return await ctx.send("Set a shared directory first with `globalbanrepl dir`.")
+        await self.store.prune_removals(time.time() - REMOVAL_RETENTION)
+        removals = await self.store.removals()
+        written = await asyncio.to_thread(replication.publish, self.index.snapshot(), root, name, removals)
+        await ctx.send(f"Snapshot published: {written} of {replication.BUCKET_COUNT} buckets rewritten.")
+
+    @globalbanrepl.command(name="pull")
+    async def globalbanrepl_pull(self, ctx, peer: str = None):
+        """Apply the bans and unbans other instances have that this one is missing."""
+        root, name = await self.replication_target()
+        if not root:
+            return await ctx.send("Set a shared directory first with `globalbanrepl dir`.")
+        peers = [peer] if peer else await asyncio.to_thread(replication.peers, root, name)
+        if not peers:
+            return await ctx.send("No other instances have published a snapshot yet.")
+
+        lines = []
+        for peer_name in peers:
+            try:
+                missing, removed, buckets = await asyncio.to_thread(
+                    replication.pull, self.index.snapshot(), root, peer_name, await self.store.removals()
+                )
+            except (OSError, ValueError) as e:
+                lines.append(f"{peer_name}: failed ({e})")
+                continue
+            if missing or removed:
+                async with self.ban_list_lock:
+                    await self.store.apply(missing, removed, source="import")
+                    self.index.apply(missing, removed)
+            if missing:
+                self.queue_bans(missing, f"Global ban replicated from {peer_name}")
+            if removed:
+                await self.unban_everywhere(removed, f"Global unban replicated from {peer_name}")
+            lines.append(
+                f"{peer_name}: {buckets} differing buckets, {len(missing)} bans added, {len(removed)} removed"
+            )
+        await ctx.send("\n".join(lines))
+
+    async def unban_in_guild(self, guild, user_ids, reason):
+        """Unban the IDs that are banned in one guild.
+
+        Returns {"unbanned", "not_banned", "failed"} counts.
+        """
+        counts = {"unbanned": 0, "not_banned": 0, "failed": 0}
+        if len(user_ids) > UNBAN_READ_THRESHOLD:
             try:
-                count = 0
-                async for ban_entry in guild.bans():
-                    user_id = str(ban_entry.user.id)
-                    if user_id not in banned_users:
-                        banned_users[user_id] = {
-                            "reason": ban_entry.reason or "No reason provided",
-                            "banned_by": "Unknown"
-                        }
-                        count += 1
-                        if count % 5 == 0:
-                            log.info(f"Still fetching bans... {count} users added so far from {guild.name}.")
-                    await asyncio.sleep(1)  # Prevent rate limits
-                log.info(f"Fetched {len(banned_users)} bans from {guild.name}")
+                banned = await self.fetch_guild_ban_ids(guild)
             except discord.HTTPException as e:
                 log.error(f"Error fetching bans from {guild.name}: {e}")
-                if ctx:
-                    await ctx.send(f"An error occurred while fetching bans from {guild.name}.")
-        
-        await self.config.ban_list.set(banned_users)
-        log.info(f"All fetched, list updated. Total bans: {len(banned_users)}")
-        if ctx:
-            await ctx.send(f"Global ban list updated. {len(banned_users)} bans recorded.")
-    
+                counts["failed"] = len(user_ids)
+                return counts
+            counts["not_banned"] = len([uid for uid in user_ids if uid not in banned])
+            user_ids = [uid for uid in user_ids if uid in banned]
+        for user_id in user_ids:
+            try:
+                await guild.unban(discord.Object(id=user_id), reason=reason)
+                counts["unbanned"] += 1
+            except discord.NotFound:
+                counts["not_banned"] += 1
+            except discord.Forbidden:
+                log.warning(f"No permission to unban in {guild.name}")
+                counts["failed"] += len(user_ids) - counts["unbanned"] - counts["not_banned"]
+                break
+            except discord.HTTPException as e:
+                log.error(f"Failed to unban {user_id} in {guild.name}: {e}")
+                counts["failed"] += 1
+        return counts
+
+    async def unban_everywhere(self, user_ids, reason):
+        """Unban the IDs in every guild concurrently. Returns [(guild, counts)]."""
+        semaphore = asyncio.Semaphore(UNBAN_CONCURRENCY)
+        user_ids = sorted(user_ids)
+
+        async def worker(guild):
+            async with semaphore:
+                return guild, await self.unban_in_guild(guild, user_ids, reason)
+
+        return await asyncio.gather(*(worker(guild) for guild in self.bot.guilds))
+
+    @commands.command()
+    @commands.is_owner()
+    async def globalunban(self, ctx, *user_ids: str):
+        """Remove users from the global list and unban them in every server.
+
+        Pass IDs as arguments, attach a file in any format globalbanimport
+        accepts, or both.
+        """
+        ids, invalid = set(), 0
+        for raw in user_ids:
+            user_id = parse_user_id(raw.strip("<@!>"))
+            if user_id is None:
+                invalid += 1
+            else:
+                ids.add(user_id)
+        if ctx.message.attachments:
+            attachment = ctx.message.attachments[0]
+            try:
+                for user_id, _ in parse_ban_file(await attachment.read(), attachment.filename):
+                    if user_id is None:
+                        invalid += 1
+                    else:
+                        ids.add(user_id)
+            except ValueError as e:
+                return await ctx.send(f"Could not read {attachment.filename}: {e}")
+        if not ids:
+            return await ctx.send("No valid user IDs given.")
+
+        async with self.ban_list_lock:
+            _, removed = await self.store.apply(removed=ids)
+            self.index.apply({}, removed=list(ids))
+
+        msg = await ctx.send(f"Removed {removed} users from the global list. Unbanning in every server...")
+        results = await self.unban_everywhere(ids, f"Global unban by {ctx.author} ({ctx.author.id})")
+        lines = [
+            f"{guild.name}: {c['unbanned']} unbanned, {c['not_banned']} not banned, {c['failed']} failed"
+            for guild, c in results
+        ]
+        await msg.edit(content=f"Global unban finished for {len(ids)} users ({invalid} invalid IDs skipped).")
+        for page in pagify("\n".join(lines)):
+            await ctx.send(box(page))
+        log.info(f"{ctx.author} globally unbanned {len(ids)} users")
+
     @commands.command()
     async def globalban(self, ctx, user: discord.User, *, reason="No reason provided"):
         """Ban a user globally"""
-        ban_list = await self.config.ban_list()
-        if str(user.id) in ban_list:
+        entry = {"reason": reason, "banned_by": ctx.author.id, "banned_at": time.time()}
+        if not await self.store.add(user.id, **entry):
             await ctx.send("User is already globally banned.")
             return
-        
-        ban_list[str(user.id)] = {"reason": reason, "banned_by": ctx.author.id}
-        await self.config.ban_list.set(ban_list)
+        self.index.add(user.id, entry)
         
         for guild in self.bot.guilds:
             try:
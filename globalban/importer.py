@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import re
+
+ID_PATTERN = re.compile(r"^\s*<?@?!?(\d+)>?\s*[,;:|\t-]?\s*(.*?)\s*$")
+MAX_SNOWFLAKE = 2**63 - 1
+
+
+def parse_user_id(value):
+    """Return value as a Discord user ID, or None if it can't be one."""
+    value = str(value).strip()
+    if not value.isdigit() or not 17 <= len(value) <= 20:
+        return None
+    user_id = int(value)
+    return user_id if user_id <= MAX_SNOWFLAKE else None
+
+
+def _from_object(item):
+    if isinstance(item, dict):
+        raw = item.get("user_id", item.get("id"))
+        return parse_user_id(raw) if raw is not None else None, item.get("reason")
+    return parse_user_id(item), None
+
+
+def _parse_text(lines):
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        match = ID_PATTERN.match(line)
+        if match is None:
+            yield None, None
+        else:
+            yield parse_user_id(match.group(1)), match.group(2) or None
+
+
+def _parse_csv(lines):
+    reader = csv.reader(lines)
+    for row in reader:
+        if not row or not "".join(row).strip():
+            continue
+        user_id = parse_user_id(row[0])
+        if user_id is None and reader.line_num == 1:
+            continue  # Header row
+        yield user_id, (row[1].strip() or None) if len(row) > 1 else None
+
+
+def _parse_jsonl(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield _from_object(json.loads(line))
+        except json.JSONDecodeError:
+            yield None, None
+
+
+def _parse_json(stream):
+    data = json.load(stream)
+    if isinstance(data, dict):
+        # The ban_list shape: {"user_id": {"reason": ...}}
+        for raw, entry in data.items():
+            yield parse_user_id(raw), entry.get("reason") if isinstance(entry, dict) else None
+    elif isinstance(data, list):
+        for item in data:
+            yield _from_object(item)
+    else:
+        raise ValueError("Expected a JSON list or object.")
+
+
+def parse_ban_file(data, filename):
+    """Yield (user_id, reason) pairs from an uploaded ban list.
+
+    The format is chosen from the file extension: .csv, .json, .jsonl, or
+    plain text with one ID (optionally followed by a reason) per line.
+    `user_id` is None for lines that don't hold a valid ID.
+    """
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", errors="replace", newline="")
+    name = filename.lower()
+    if name.endswith(".jsonl"):
+        yield from _parse_jsonl(stream)
+    elif name.endswith(".json"):
+        yield from _parse_json(stream)
+    elif name.endswith(".csv"):
+        yield from _parse_csv(stream)
+    else:
+        yield from _parse_text(stream)
@@ -0,0 +1,148 @@
+from array import array
+from bisect import bisect_left
+import math
+
+UNKNOWN = "Unknown"
+
+
+class _InternTable:
+    """Store each distinct value once and refer to it by position."""
+
+    def __init__(self):
+        self.values = []
+        self._positions = {}
+
+    def intern(self, value):
+        position = self._positions.get(value)
+        if position is None:
+            position = self._positions[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+
+class BanIndex:
+    """Compact in-memory copy of the global ban list.
+
+    User IDs live in a sorted int64 array searched with bisect. Reasons and
+    moderators are interned in side tables and referenced from parallel
+    arrays, so a million bans costs a few bytes per entry plus one copy of
+    each distinct string instead of a dict per user.
+    """
+
+    def __init__(self):
+        self._ids = array("q")
+        self._reasons = array("I")
+        self._moderators = array("I")
+        self._banned_at = array("d")
+        self._reason_table = _InternTable()
+        self._moderator_table = _InternTable()
+
+    @classmethod
+    def from_dict(cls, ban_list):
+        """Build an index from a ban_list style dict of str(user_id) -> entry."""
+        index = cls()
+        index._load(sorted((int(uid), data) for uid, data in ban_list.items()))
+        return index
+
+    def _load(self, rows):
+        self.__init__()
+        for user_id, data in rows:
+            self._ids.append(user_id)
+            self._append_data(data)
+
+    def _append_data(self, data):
+        banned_at = data.get("banned_at")
+        self._reasons.append(self._reason_table.intern(data.get("reason", "No reason provided")))
+        self._moderators.append(self._moderator_table.intern(data.get("banned_by", UNKNOWN)))
+        self._banned_at.append(math.nan if banned_at is None else banned_at)
+
+    def _position(self, user_id):
+        position = bisect_left(self._ids, user_id)
+        if position < len(self._ids) and self._ids[position] == user_id:
+            return position
+        return None
+
+    def __contains__(self, user_id):
+        return self._position(user_id) is not None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def _entry(self, position):
+        entry = {
+            "reason": self._reason_table.values[self._reasons[position]],
+            "banned_by": self._moderator_table.values[self._moderators[position]],
+        }
+        if not math.isnan(self._banned_at[position]):
+            entry["banned_at"] = self._banned_at[position]
+        return entry
+
+    def get(self, user_id):
+        position = self._position(user_id)
+        return None if position is None else self._entry(position)
+
+    def add(self, user_id, data):
+        """Insert a ban. Returns False if the user is already indexed."""
+        position = bisect_left(self._ids, user_id)
+        if position < len(self._ids) and self._ids[position] == user_id:
+            return False
+        banned_at = data.get("banned_at")
+        self._ids.insert(position, user_id)
+        self._reasons.insert(position, self._reason_table.intern(data.get("reason", "No reason provided")))
+        self._moderators.insert(position, self._moderator_table.intern(data.get("banned_by", UNKNOWN)))
+        self._banned_at.insert(position, math.nan if banned_at is None else banned_at)
+        return True
+
+    def remove(self, user_id):
+        """Delete a ban. Returns False if the user was not indexed."""
+        position = self._position(user_id)
+        if position is None:
+            return False
+        for column in (self._ids, self._reasons, self._moderators, self._banned_at):
+            del column[position]
+        return True
+
+    def snapshot(self):
+        """Copy the arrays so the copy can be read from another thread.
+
+        The intern tables are append-only and are shared with the copy.
+        """
+        copy = BanIndex.__new__(BanIndex)
+        copy._ids = array("q", self._ids)
+        copy._reasons = array("I", self._reasons)
+        copy._moderators = array("I", self._moderators)
+        copy._banned_at = array("d", self._banned_at)
+        copy._reason_table = self._reason_table
+        copy._moderator_table = self._moderator_table
+        return copy
+
+    def clear(self):
+        self.__init__()
+
+    def apply(self, added, removed=()):
+        """Insert and delete many bans, rebuilding the arrays once for large batches."""
+        if len(added) + len(removed) < 1000:
+            for user_id in removed:
+                self.remove(user_id)
+            for user_id, data in added.items():
+                self.add(user_id, data)
+            return
+        removed = set(removed)
+        rows = {
+            self._ids[i]: self._entry(i) for i in range(len(self._ids)) if self._ids[i] not in removed
+        }
+        for user_id, data in added.items():
+            rows.setdefault(user_id, data)
+        self._load(sorted(rows.items()))
+
+    def items(self, start=0, stop=None):
+        """Yield (user_id, entry) pairs by position without materializing the list."""
+        for position in range(start, len(self._ids) if stop is None else min(stop, len(self._ids))):
+            yield self._ids[position], self._entry(position)
+
+    def to_dict(self):
+        """Export in the ban_list shape: str(user_id) -> {"reason", "banned_by"}."""
+        return {str(user_id): entry for user_id, entry in self.items()}
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS partition_workers (
+    worker_id TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS partition_claims (
+    guild_id INTEGER PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS partition_claims_worker ON partition_claims (worker_id);
+CREATE TABLE IF NOT EXISTS partition_guilds (
+    worker_id TEXT NOT NULL,
+    guild_id INTEGER NOT NULL,
+    PRIMARY KEY (worker_id, guild_id)
+);
+"""
+
+
+def _weight(guild_id, worker_id):
+    """Rendezvous hash: every process ranks the candidates for a guild the same way."""
+    return hashlib.sha256(f"{guild_id}:{worker_id}".encode()).digest()
+
+
+class PartitionCoordinator:
+    """Split guilds between bot processes through leases in a shared SQLite file.
+
+    Every process heartbeats its own worker row together with the guilds it
+    can see. Each guild goes to the live worker that sees it with the highest
+    rendezvous hash, so a guild only one process can reach (e.g. a shard's
+    own guilds) always goes to that process, and shared guilds are spread
+    evenly. Claims are taken inside one IMMEDIATE transaction, so two
+    processes never own the same guild, and the claims of a process that
+    stops heartbeating expire after `lease` seconds.
+    """
+
+    def __init__(self, path, worker_id, lease=300):
+        self.path = str(path)
+        self.worker_id = worker_id
+        self.lease = lease
+        self.owned = set()
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        self._conn = conn
+
+    async def open(self):
+        await asyncio.to_thread(self._open)
+
+    def _release(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("DELETE FROM partition_claims WHERE worker_id = ?", (self.worker_id,))
+        self._conn.execute("DELETE FROM partition_guilds WHERE worker_id = ?", (self.worker_id,))
+        self._conn.execute("DELETE FROM partition_workers WHERE worker_id = ?", (self.worker_id,))
+        self._conn.execute("COMMIT")
+        self._conn.close()
+        self._conn = None
+
+    async def close(self):
+        """Give up every claim so the other processes can take them over."""
+        async with self._lock:
+            if self._conn is not None:
+                await asyncio.to_thread(self._release)
+        self.owned = set()
+
+    def _heartbeat(self, guild_ids):
+        now = time.time()
+        expires = now + self.lease
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO partition_workers (worker_id, expires) VALUES (?, ?) "
+                "ON CONFLICT (worker_id) DO UPDATE SET expires = excluded.expires",
+                (self.worker_id, expires),
+            )
+            conn.execute("DELETE FROM partition_workers WHERE expires < ?", (now,))
+            conn.execute("DELETE FROM partition_claims WHERE expires < ?", (now,))
+            conn.execute(
+                "DELETE FROM partition_guilds WHERE worker_id NOT IN (SELECT worker_id FROM partition_workers)"
+            )
+            conn.execute("DELETE FROM partition_guilds WHERE worker_id = ?", (self.worker_id,))
+            conn.executemany(
+                "INSERT INTO partition_guilds (worker_id, guild_id) VALUES (?, ?)",
+                [(self.worker_id, guild_id) for guild_id in guild_ids],
+            )
+            workers = conn.execute("SELECT COUNT(*) FROM partition_workers").fetchone()[0]
+
+            candidates = {}  # guild ID -> live workers that can see it
+            for worker_id, guild_id in conn.execute("SELECT worker_id, guild_id FROM partition_guilds"):
+                candidates.setdefault(guild_id, []).append(worker_id)
+            mine = {
+                guild_id for guild_id in guild_ids
+                if max(candidates[guild_id], key=lambda w: _weight(guild_id, w)) == self.worker_id
+            }
+
+            conn.execute("UPDATE partition_claims SET expires = ? WHERE worker_id = ?", (expires, self.worker_id))
+            claims = dict(conn.execute("SELECT guild_id, worker_id FROM partition_claims"))
+            # Hand back guilds that now rank higher for another worker; it claims them on its next heartbeat.
+            surplus = [g for g, w in claims.items() if w == self.worker_id and g not in mine]
+            conn.executemany("DELETE FROM partition_claims WHERE guild_id = ?", [(g,) for g in surplus])
+            owned = {g for g, w in claims.items() if w == self.worker_id and g in mine}
+            for guild_id in mine - claims.keys():
+                conn.execute(
+                    "INSERT INTO partition_claims (guild_id, worker_id, expires) VALUES (?, ?, ?)",
+                    (guild_id, self.worker_id, expires),
+                )
+                owned.add(guild_id)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return owned, workers
+
+    async def heartbeat(self, guild_ids):
+        """Renew this worker's lease and rebalance its claims.
+
+        The owned guild IDs are kept in `self.owned`. Returns the number of
+        live workers.
+        """
+        guild_ids = list(guild_ids)
+        async with self._lock:
+            self.owned, workers = await asyncio.to_thread(self._heartbeat, guild_ids)
+        return workers
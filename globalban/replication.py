@@ -0,0 +1,155 @@
+"""Exchange the global ban list between bot instances through a shared directory.
+
+Each instance publishes into `<shared dir>/<instance name>/`:
+
+    manifest.json        bucket count and one content hash per bucket
+    buckets/<nnn>.jsonl  the entries of one bucket
+    removals.jsonl       users removed recently, with the time of removal
+
+Users are spread over buckets by ID and each bucket hash covers its sorted
+IDs, so two instances only need to read the buckets whose hashes differ, and
+a publish only rewrites the buckets that changed since the last one.
+Removals are published separately so a pull can apply them instead of
+re-adding users another instance unbanned.
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+BUCKET_COUNT = 256
+MANIFEST_VERSION = 1
+
+
+def bucket_of(user_id):
+    return (user_id >> 22) % BUCKET_COUNT  # Creation timestamp bits spread evenly
+
+
+def bucket_hashes(index):
+    """Return one hex digest per bucket, covering the bucket's sorted user IDs."""
+    hashes = [hashlib.sha256() for _ in range(BUCKET_COUNT)]
+    for user_id in index:  # Sorted, so each bucket sees its IDs in order
+        hashes[bucket_of(user_id)].update(b"%d\n" % user_id)
+    return [h.hexdigest() for h in hashes]
+
+
+def _write_atomic(path, text):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_manifest(folder):
+    try:
+        manifest = json.loads((folder / "manifest.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("bucket_count") != BUCKET_COUNT:
+        raise ValueError(f"{folder} uses an incompatible snapshot format.")
+    return manifest
+
+
+def publish(index, root, instance, removals=None):
+    """Write this instance's snapshot. Returns how many buckets were rewritten.
+
+    `index` should be a snapshot, since this runs in a worker thread.
+    `removals` maps recently removed user IDs to their removal time.
+    """
+    folder = Path(root) / instance
+    (folder / "buckets").mkdir(parents=True, exist_ok=True)
+    previous = _read_manifest(folder)
+    old_hashes = previous["buckets"] if previous else [None] * BUCKET_COUNT
+    new_hashes = bucket_hashes(index)
+    changed = {b for b in range(BUCKET_COUNT) if new_hashes[b] != old_hashes[b]}
+
+    if changed:
+        lines = {b: [] for b in changed}
+        for user_id, entry in index.items():
+            bucket = bucket_of(user_id)
+            if bucket in changed:
+                lines[bucket].append(json.dumps({"user_id": str(user_id), **entry}))
+        for bucket, bucket_lines in lines.items():
+            text = "\n".join(bucket_lines) + "\n" if bucket_lines else ""
+            _write_atomic(folder / "buckets" / f"{bucket:03d}.jsonl", text)
+
+    _write_atomic(folder / "removals.jsonl", "".join(
+        json.dumps({"user_id": str(user_id), "removed_at": removed_at}) + "\n"
+        for user_id, removed_at in sorted((removals or {}).items())
+    ))
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "instance": instance,
+        "bucket_count": BUCKET_COUNT,
+        "generated_at": time.time(),
+        "count": len(index),
+        "buckets": new_hashes,
+    }
+    _write_atomic(folder / "manifest.json", json.dumps(manifest))
+    return len(changed)
+
+
+def peers(root, instance):
+    """List the other instances that have published into the shared directory."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.name != instance and (p / "manifest.json").is_file())
+
+
+def _read_removals(folder):
+    try:
+        handle = (folder / "removals.jsonl").open(encoding="utf-8")
+    except FileNotFoundError:
+        return {}  # Published before removals were shared
+    with handle:
+        return {
+            int(entry["user_id"]): entry["removed_at"]
+            for entry in map(json.loads, filter(str.strip, handle))
+        }
+
+
+def pull(index, root, peer, removals=None):
+    """Work out the delta between the peer's snapshot and this one.
+
+    Only buckets whose hashes differ are read. An entry the peer has is only
+    new if it wasn't removed here after it was banned, and a local entry is
+    removed if the peer removed it after it was banned here. `removals` maps
+    locally removed user IDs to their removal time.
+
+    Returns (entries to add, user IDs to remove, buckets read), where entries
+    maps user IDs to ban_list style dicts.
+    """
+    folder = Path(root) / peer
+    manifest = _read_manifest(folder)
+    if manifest is None:
+        raise ValueError(f"No snapshot published by {peer}.")
+    removals = removals or {}
+    local_hashes = bucket_hashes(index)
+    differing = [b for b in range(BUCKET_COUNT) if manifest["buckets"][b] != local_hashes[b]]
+
+    missing = {}
+    for bucket in differing:
+        try:
+            handle = (folder / "buckets" / f"{bucket:03d}.jsonl").open(encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        with handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                user_id = int(entry.pop("user_id"))
+                if user_id in index:
+                    continue
+                if user_id in removals and removals[user_id] >= (entry.get("banned_at") or 0):
+                    continue  # Unbanned here after the peer's ban
+                missing[user_id] = entry
+
+    removed = []
+    for user_id, removed_at in _read_removals(folder).items():
+        entry = index.get(user_id)
+        if entry is not None and removed_at >= entry.get("banned_at", 0):
+            removed.append(user_id)
+    return missing, removed, len(differing)
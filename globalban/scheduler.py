@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import random
+import time
+
+log = logging.getLogger("red.globalban.scheduler")
+
+
+class Job:
+    def __init__(self, name, interval, func, jitter, enabled):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.jitter = jitter
+        self.enabled = enabled
+        self.lock = asyncio.Lock()
+        self.task = None
+
+
+class JobScheduler:
+    """Run the cog's periodic jobs from timestamps persisted in Config.
+
+    `state` is a Config value holding {job name: {"last_run", "duration",
+    "next_run"}}. After a restart a job waits for its stored next run
+    instead of starting immediately, each run picks a random delay of up to
+    `jitter` times the interval, and a job never overlaps with itself.
+    """
+
+    def __init__(self, bot, state):
+        self.bot = bot
+        self.state = state
+        self.jobs = {}
+
+    def add(self, name, interval, func, jitter=0.1, enabled=None):
+        """Register a job. `enabled` is an optional coroutine function checked before each run."""
+        self.jobs[name] = Job(name, interval, func, jitter, enabled)
+
+    def start(self):
+        for job in self.jobs.values():
+            job.task = asyncio.create_task(self._loop(job))
+
+    def stop(self):
+        for job in self.jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+
+    def is_running(self, name):
+        return self.jobs[name].lock.locked()
+
+    def _next_run(self, job, after):
+        return after + job.interval + random.uniform(0, job.interval * job.jitter)
+
+    async def _loop(self, job):
+        await self.bot.wait_until_ready()
+        while True:
+            next_run = (await self.state()).get(job.name, {}).get("next_run")
+            if next_run is None:
+                # Never run before: start within the jitter window rather than at once.
+                next_run = time.time() + random.uniform(0, job.interval * job.jitter)
+                await self._save(job.name, next_run=next_run)
+            delay = next_run - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue  # A manual run may have moved the schedule while we slept
+            if job.enabled is not None and not await job.enabled():
+                await self._save(job.name, next_run=self._next_run(job, time.time()))
+                continue
+            if job.lock.locked():
+                await asyncio.sleep(60)
+                continue
+            try:
+                await self.run(job.name)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception(f"Scheduled job {job.name} failed")
+
+    async def run(self, name, *args, **kwargs):
+        """Run a job now, passing any arguments through, and reschedule it."""
+        job = self.jobs[name]
+        async with job.lock:
+            started = time.time()
+            cancelled = False
+            log.info(f"Starting job {name}...")
+            try:
+                return await job.func(*args, **kwargs)
+            except asyncio.CancelledError:
+                cancelled = True  # Unloading: keep the old schedule so the job runs after restart
+                raise
+            finally:
+                if not cancelled:
+                    duration = time.time() - started
+                    await self._save(name, last_run=started, duration=duration, next_run=self._next_run(job, started))
+                    log.info(f"Job {name} finished in {duration:.0f}s.")
+
+    async def _save(self, name, **values):
+        async with self.state() as state:
+            state.setdefault(name, {}).update(values)
+
+    async def status(self):
+        """Return (name, running, next run, last run, last duration) for every job."""
+        state = await self.state()
+        return [
+            (
+                name,
+                job.lock.locked(),
+                state.get(name, {}).get("next_run"),
+                state.get(name, {}).get("last_run"),
+                state.get(name, {}).get("duration"),
+            )
+            for name, job in self.jobs.items()
+        ]
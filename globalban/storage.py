@@ -0,0 +1,258 @@
+import asyncio
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bans (
+    user_id INTEGER PRIMARY KEY,
+    reason TEXT NOT NULL,
+    banned_by INTEGER,
+    banned_at REAL,
+    source TEXT NOT NULL DEFAULT 'manual'
+);
+CREATE INDEX IF NOT EXISTS bans_banned_by ON bans (banned_by);
+CREATE INDEX IF NOT EXISTS bans_banned_at ON bans (banned_at);
+CREATE TABLE IF NOT EXISTS removals (
+    user_id INTEGER PRIMARY KEY,
+    removed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+# Where a ban came from: "scan" bans were read from a guild and go away once
+# no guild bans the user, "manual" and "import" bans stay until removed.
+SOURCES = ("scan", "manual", "import")
+
+
+def _moderator_id(banned_by):
+    """Map the Config representation of banned_by to a column value."""
+    if isinstance(banned_by, int):
+        return banned_by
+    if isinstance(banned_by, str) and banned_by.isdigit():
+        return int(banned_by)
+    return None  # "Unknown"
+
+
+def _entry(reason, banned_by, banned_at):
+    """Build a ban entry in the shape the old Config ban_list used."""
+    entry = {"reason": reason, "banned_by": banned_by if banned_by is not None else "Unknown"}
+    if banned_at is not None:
+        entry["banned_at"] = banned_at
+    return entry
+
+
+class BanStore:
+    """One row per global ban in a local SQLite file.
+
+    Every call runs in a worker thread and calls are serialized, so batch
+    writes from the update loop are applied atomically in one transaction.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    async def _run(self, func, *args):
+        async with self._lock:
+            return await asyncio.to_thread(func, *args)
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(bans)")}
+        if "source" not in columns:
+            # Older stores had no source; a missing moderator is the best remaining hint of a scan.
+            with conn:
+                conn.execute("ALTER TABLE bans ADD COLUMN source TEXT NOT NULL DEFAULT 'manual'")
+                conn.execute("UPDATE bans SET source = 'scan' WHERE banned_by IS NULL")
+        conn.execute("CREATE INDEX IF NOT EXISTS bans_source ON bans (source)")
+        conn.commit()
+        self._conn = conn
+
+    async def open(self):
+        await self._run(self._open)
+
+    async def close(self):
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+
+    def _get(self, user_id):
+        row = self._conn.execute(
+            "SELECT reason, banned_by, banned_at FROM bans WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return _entry(*row) if row else None
+
+    async def get(self, user_id):
+        """Return the entry for a user, or None if they are not banned."""
+        return await self._run(self._get, int(user_id))
+
+    def _add(self, user_id, reason, banned_by, banned_at, source):
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO bans (user_id, reason, banned_by, banned_at, source) VALUES (?, ?, ?, ?, ?)",
+                (user_id, reason, _moderator_id(banned_by), banned_at, source),
+            )
+            self._conn.execute("DELETE FROM removals WHERE user_id = ?", (user_id,))
+        return cursor.rowcount == 1
+
+    async def add(self, user_id, reason, banned_by="Unknown", banned_at=None, source="manual"):
+        """Insert a ban. Returns False if the user was already listed."""
+        if banned_at is None:
+            banned_at = time.time()
+        return await self._run(self._add, int(user_id), reason, banned_by, banned_at, source)
+
+    def _tombstone(self, user_ids):
+        """Remember when listed users were removed, so replication can pass the removal on."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO removals (user_id, removed_at) SELECT user_id, ? FROM bans WHERE user_id = ?",
+            [(time.time(), int(uid)) for uid in user_ids],
+        )
+
+    def _remove(self, user_id):
+        with self._conn:
+            self._tombstone([user_id])
+            cursor = self._conn.execute("DELETE FROM bans WHERE user_id = ?", (user_id,))
+        return cursor.rowcount == 1
+
+    async def remove(self, user_id):
+        """Delete a ban. Returns False if the user was not listed."""
+        return await self._run(self._remove, int(user_id))
+
+    def _apply(self, added, removed, source):
+        rows = [
+            (int(uid), data["reason"], _moderator_id(data.get("banned_by")), data.get("banned_at"), source)
+            for uid, data in added.items()
+        ]
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO bans (user_id, reason, banned_by, banned_at, source) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            added_count = self._conn.total_changes - before
+            self._conn.executemany("DELETE FROM removals WHERE user_id = ?", [(row[0],) for row in rows])
+            self._tombstone(removed)
+            before = self._conn.total_changes
+            self._conn.executemany("DELETE FROM bans WHERE user_id = ?", [(int(uid),) for uid in removed])
+            removed_count = self._conn.total_changes - before
+        return added_count, removed_count
+
+    async def apply(self, added=None, removed=(), source="manual"):
+        """Insert and delete many bans in one transaction.
+
+        `added` maps user IDs to ban_list style entries, all recorded with
+        `source`. Existing rows are left untouched. Returns (rows added, rows
+        removed).
+        """
+        return await self._run(self._apply, added or {}, list(removed), source)
+
+    def _attribute(self, attributions):
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "UPDATE bans SET banned_by = ?, banned_at = ? WHERE user_id = ? AND banned_by IS NULL",
+                [(moderator, banned_at, user_id) for user_id, (moderator, banned_at) in attributions.items()],
+            )
+            return self._conn.total_changes - before
+
+    async def attribute(self, attributions):
+        """Fill in moderator and time for bans that have none, in one transaction.
+
+        `attributions` maps user IDs to (moderator ID, timestamp). Returns the
+        number of rows updated.
+        """
+        return await self._run(self._attribute, attributions)
+
+    def _ids(self, unattributed, source):
+        conditions, params = [], []
+        if unattributed:
+            conditions.append("banned_by IS NULL")
+        if source is not None:
+            conditions.append("source = ?")
+            params.append(source)
+        query = "SELECT user_id FROM bans"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return [row[0] for row in self._conn.execute(query, params)]
+
+    async def ids(self, unattributed=False, source=None):
+        """Return every banned user ID, optionally only those without a moderator or from one source."""
+        return await self._run(self._ids, unattributed, source)
+
+    def _sources(self, user_ids):
+        return dict(self._conn.execute(
+            f"SELECT user_id, source FROM bans WHERE user_id IN ({','.join('?' * len(user_ids))})", user_ids
+        )) if user_ids else {}
+
+    async def sources(self, user_ids):
+        """Return {user ID: source} for the listed users among `user_ids`."""
+        return await self._run(self._sources, [int(uid) for uid in user_ids])
+
+    def _all(self):
+        return {
+            str(user_id): _entry(reason, banned_by, banned_at)
+            for user_id, reason, banned_by, banned_at in self._conn.execute(
+                "SELECT user_id, reason, banned_by, banned_at FROM bans ORDER BY user_id"
+            )
+        }
+
+    async def all(self):
+        """Return the whole list in the old Config ban_list shape."""
+        return await self._run(self._all)
+
+    async def count(self):
+        return await self._run(lambda: self._conn.execute("SELECT COUNT(*) FROM bans").fetchone()[0])
+
+    async def data_version(self):
+        """Changes whenever another connection, e.g. another bot process, commits."""
+        return await self._run(lambda: self._conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def _removals(self, since):
+        return dict(self._conn.execute("SELECT user_id, removed_at FROM removals WHERE removed_at >= ?", (since,)))
+
+    async def removals(self, since=0):
+        """Return {user ID: removal time} for bans removed since `since`."""
+        return await self._run(self._removals, since)
+
+    def _prune_removals(self, before):
+        with self._conn:
+            self._conn.execute("DELETE FROM removals WHERE removed_at < ?", (before,))
+
+    async def prune_removals(self, before):
+        """Forget removals older than `before`."""
+        await self._run(self._prune_removals, before)
+
+    def _clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM bans")
+
+    async def clear(self):
+        await self._run(self._clear)
+
+    def _migrate(self, ban_list):
+        if self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+            return None
+        rows = [
+            (
+                int(uid), data.get("reason", "No reason provided"), _moderator_id(data.get("banned_by")), None,
+                "scan" if _moderator_id(data.get("banned_by")) is None else "manual",
+            )
+            for uid, data in ban_list.items()
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO bans (user_id, reason, banned_by, banned_at, source) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('migrated', ?)", (str(time.time()),))
+        return len(rows)
+
+    async def migrate(self, ban_list):
+        """Import the old Config blob once. Returns the row count, or None if already done."""
+        return await self._run(self._migrate, ban_list)
@@ -0,0 +1,4 @@
+from .invitepool import InvitePool
+
+async def setup(bot):
+    await bot.add_cog(InvitePool(bot))
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import discord
+from redbot.core import commands
+from redbot.core.bot import Red
+
+log = logging.getLogger("red.invitepool")
+
+POOL_SIZE = 3  # invites kept ready per server
+INVITE_MAX_AGE = 86400  # seconds an invite stays valid
+EXPIRY_MARGIN = 600  # don't hand out invites this close to expiring
+CREATE_DELAY = 1  # seconds between invite creations while topping up
+PRUNE_INTERVAL = 3600
+
+class InvitePool(commands.Cog):
+    """Keep a few single-use invites per server ready for other cogs to hand out.
+
+    Other cogs call `take(guild)` through `bot.get_cog("InvitePool")` and fall
+    back to creating their own invite when the cog isn't loaded.
+    """
+
+    def __init__(self, bot: Red):
+        self.bot = bot
+        self.pools = {}  # guild ID -> deque of discord.Invite
+        self.refill_queue = asyncio.Queue()
+        self.queued = set()
+        self.refill_task = None
+        self.prune_task = None
+
+    async def cog_load(self):
+        self.refill_task = asyncio.create_task(self.refill_loop())
+        self.prune_task = asyncio.create_task(self.prune_loop())
+
+    def cog_unload(self):
+        for task in (self.refill_task, self.prune_task):
+            if task is not None:
+                task.cancel()
+
+    def is_usable(self, invite: discord.Invite) -> bool:
+        if invite.uses and invite.max_uses and invite.uses >= invite.max_uses:
+            return False
+        expires_at = invite.created_at + timedelta(seconds=INVITE_MAX_AGE - EXPIRY_MARGIN)
+        return expires_at > datetime.now(timezone.utc)
+
+    def schedule_refill(self, guild_id: int):
+        if guild_id not in self.queued:
+            self.queued.add(guild_id)
+            self.refill_queue.put_nowait(guild_id)
+
+    async def create_invite(self, guild: discord.Guild, reason: str = None):
+        """Create a single-use expiring invite in the first channel that allows it."""
+        channel = next(
+            (c for c in guild.text_channels if c.permissions_for(guild.me).create_instant_invite), None
+        )
+        if channel is None:
+            return None
+        try:
+            return await channel.create_invite(
+                max_uses=1, max_age=INVITE_MAX_AGE, unique=True, reason=reason or "Invite pool"
+            )
+        except discord.HTTPException as e:
+            log.warning(f"Could not create an invite in {guild.name}: {e}")
+            return None
+
+    async def take(self, guild: discord.Guild, reason: str = None):
+        """Hand out a ready invite for the guild, creating one only if the pool is empty."""
+        pool = self.pools.setdefault(guild.id, deque())
+        invite = None
+        while pool:
+            candidate = pool.popleft()
+            if self.is_usable(candidate):
+                invite = candidate
+                break
+        self.schedule_refill(guild.id)
+        if invite is None:
+            invite = await self.create_invite(guild, reason)
+        return invite
+
+    async def refill_loop(self):
+        await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            self.schedule_refill(guild.id)
+        while True:
+            guild_id = await self.refill_queue.get()
+            self.queued.discard(guild_id)
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                self.pools.pop(guild_id, None)
+                continue
+            pool = self.pools.setdefault(guild_id, deque())
+            while len(pool) < POOL_SIZE:
+                invite = await self.create_invite(guild)
+                if invite is None:
+                    break  # No permission or rate limited; the next prune retries
+                pool.append(invite)
+                await asyncio.sleep(CREATE_DELAY)
+
+    async def prune_loop(self):
+        """Drop invites that expired and queue top-ups for pools that ran low."""
+        await self.bot.wait_until_ready()
+        while True:
+            await asyncio.sleep(PRUNE_INTERVAL)
+            for guild_id, pool in list(self.pools.items()):
+                usable = deque(invite for invite in pool if self.is_usable(invite))
+                self.pools[guild_id] = usable
+                if len(usable) < POOL_SIZE:
+                    self.schedule_refill(guild_id)
+
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite: discord.Invite):
+        # Single-use invites are deleted by Discord once they are used.
+        if invite.guild is None or invite.guild.id not in self.pools:
+            return
+        pool = self.pools[invite.guild.id]
+        remaining = deque(i for i in pool if i.code != invite.code)
+        if len(remaining) != len(pool):
+            self.pools[invite.guild.id] = remaining
+            self.schedule_refill(invite.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self.schedule_refill(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.pools.pop(guild.id, None)
+
+    @commands.command()
+    @commands.is_owner()
+    async def invitepool(self, ctx):
+        """Show how many ready invites each server has."""
+        stocked = sum(1 for pool in self.pools.values() if pool)
+        total = sum(len(pool) for pool in self.pools.values())
+        await ctx.send(
+            f"{total} invites ready across {stocked} of {len(self.bot.guilds)} servers "
+            f"({self.refill_queue.qsize()} servers waiting for a top-up)."
+        )
@@ -0,0 +1,174 @@
+# rolemanager/roleindex.py
+import re
+
+TOKEN = re.compile(r'\s*(\(|\)|&|\||!|,|"[^"]*"|<@&\d+>|[^\s()&|!,"]+)')
+OPERATORS = {"and": "&", "&": "&", ",": "&", "or": "|", "|": "|", "not": "!", "!": "!"}
+
+
+class GuildRoleIndex:
+    """Role ID -> bitset of members for one guild.
+
+    Each member gets a slot number, and every role is a Python int with the
+    slots of its members set, so role queries are a handful of big-int
+    operations instead of a scan over every member's role list.
+    """
+
+    def __init__(self):
+        self.slots = {}  # member ID -> slot
+        self.member_ids = []  # slot -> member ID, None for a freed slot
+        self.member_roles = {}  # member ID -> frozenset of role IDs
+        self.free = []
+        self.roles = {}  # role ID -> bitset
+        self.all = 0  # bitset of every occupied slot
+
+    @classmethod
+    def build(cls, members):
+        """Build an index from (member ID, role IDs) pairs.
+
+        Slots are collected per role first and each role's bitset is made in
+        one pass, so the build is linear in the number of role assignments.
+        """
+        index = cls()
+        slots_by_role = {}
+        for slot, (member_id, role_ids) in enumerate(members):
+            role_ids = frozenset(role_ids)
+            index.slots[member_id] = slot
+            index.member_ids.append(member_id)
+            index.member_roles[member_id] = role_ids
+            for role_id in role_ids:
+                slots_by_role.setdefault(role_id, []).append(slot)
+        size = len(index.member_ids) // 8 + 1
+        for role_id, slots in slots_by_role.items():
+            buffer = bytearray(size)
+            for slot in slots:
+                buffer[slot >> 3] |= 1 << (slot & 7)
+            index.roles[role_id] = int.from_bytes(buffer, "little")
+        index.all = (1 << len(index.member_ids)) - 1
+        return index
+
+    def set_member(self, member_id, role_ids):
+        """Record a member's current roles, touching only the roles that changed."""
+        slot = self.slots.get(member_id)
+        if slot is None:
+            slot = self.free.pop() if self.free else len(self.member_ids)
+            if slot == len(self.member_ids):
+                self.member_ids.append(member_id)
+            else:
+                self.member_ids[slot] = member_id
+            self.slots[member_id] = slot
+        bit = 1 << slot
+        self.all |= bit
+        before = self.member_roles.get(member_id, frozenset())
+        after = self.member_roles[member_id] = frozenset(role_ids)
+        for role_id in before - after:
+            self.roles[role_id] = self.roles.get(role_id, 0) & ~bit
+        for role_id in after - before:
+            self.roles[role_id] = self.roles.get(role_id, 0) | bit
+
+    def remove_member(self, member_id):
+        slot = self.slots.pop(member_id, None)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        self.all &= mask
+        for role_id in self.member_roles.pop(member_id, ()):
+            if role_id in self.roles:
+                self.roles[role_id] &= mask
+        self.member_ids[slot] = None
+        self.free.append(slot)
+
+    def remove_role(self, role_id):
+        self.roles.pop(role_id, None)
+
+    def bits(self, role_id):
+        return self.roles.get(role_id, 0) & self.all
+
+    def members_in(self, bits):
+        """Yield the member IDs whose slots are set in `bits`."""
+        while bits:
+            low = bits & -bits
+            yield self.member_ids[low.bit_length() - 1]
+            bits ^= low
+
+
+def _tokenize(query):
+    """Split a query into operators, parentheses and role references.
+
+    Consecutive bare words form one role name, so `Server Booster and not
+    Muted` reads as two roles.
+    """
+    tokens = []
+    position = 0
+    query = query.strip()
+    while position < len(query):
+        match = TOKEN.match(query, position)
+        if match is None:
+            raise ValueError(f"Could not read the query near `{query[position:]}`.")
+        position = match.end()
+        token = match.group(1)
+        if token.lower() in OPERATORS:
+            tokens.append(OPERATORS[token.lower()])
+        elif token in "()":
+            tokens.append(token)
+        elif token.startswith('"'):
+            tokens.append(("role", token[1:-1]))
+        elif tokens and isinstance(tokens[-1], tuple) and not tokens[-1][1].startswith("<@&"):
+            tokens[-1] = ("role", f"{tokens[-1][1]} {token}")
+        else:
+            tokens.append(("role", token))
+    return tokens
+
+
+def evaluate_query(query, index, resolve_role):
+    """Evaluate a boolean role query to a member bitset.
+
+    Supports `and`/`&`/`,`, `or`/`|`, `not`/`!` and parentheses. Roles are
+    names (quote names containing operators), IDs or mentions, resolved to a
+    role ID by `resolve_role`, which raises ValueError for unknown roles.
+    """
+    tokens = _tokenize(query)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def expression():
+        bits = term()
+        while peek() == "|":
+            take()
+            bits |= term()
+        return bits
+
+    def term():
+        bits = factor()
+        while peek() == "&":
+            take()
+            bits &= factor()
+        return bits
+
+    def factor():
+        token = peek()
+        if token is None:
+            raise ValueError("The query ended unexpectedly.")
+        take()
+        if token == "!":
+            return index.all & ~factor()
+        if token == "(":
+            bits = expression()
+            if peek() != ")":
+                raise ValueError("Missing closing parenthesis.")
+            take()
+            return bits
+        if isinstance(token, tuple):
+            return index.bits(resolve_role(token[1]))
+        raise ValueError(f"Unexpected `{token}` in the query.")
+
+    bits = expression()
+    if position != len(tokens):
+        raise ValueError("Unexpected text at the end of the query.")
+    return bits
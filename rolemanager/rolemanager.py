@@ -1,8 +1,24 @@
 # rolemanager/rolemanager.py
-from redbot.core import commands
+from redbot.core import Config, commands
 import discord
 from discord import app_commands
 from redbot.core.bot import Red
+import asyncio
+import logging
+import secrets
+import time
+
+from .roleindex import GuildRoleIndex, evaluate_query
+
+log = logging.getLogger("red.rolemanager")
+
+MASSROLE_BATCH = 50  # members per saved cursor step
+MEMBER_BATCH = 1000  # members per streamed batch, one fetch_members page
+MASSROLE_CONCURRENCY = 5
+PROGRESS_INTERVAL = 10  # seconds between progress edits
+INDEX_SNAPSHOT_BATCH = 5000  # members read from the cache between yields to the event loop
+
+
 
 class RoleManager(commands.Cog):
     """Role Management Cog for Redbot."""
@@ -10,15 +26,261 @@ class RoleManager(commands.Cog):
     def __init__(self, bot: Red):
         self.bot = bot
         self.tree = bot.tree
+        self.config = Config.get_conf(self, identifier=5720193846, force_registration=True)
+        self.config.register_global(massrole_jobs={})  # job ID -> saved job state
+        self.jobs = {}  # job ID -> running task
+        self.resume_task = None
+        self.role_indexes = {}  # guild ID -> GuildRoleIndex, built on first use
+        self.index_builds = {}  # guild ID -> task building its index
+        self.index_pending = {}  # guild ID -> member changes seen while its index is built
+
+    async def cog_load(self):
+        self.resume_task = asyncio.create_task(self.resume_jobs())
+
+    def cog_unload(self):
+        if self.resume_task is not None:
+            self.resume_task.cancel()
+        for task in [*self.jobs.values(), *self.index_builds.values()]:
+            task.cancel()  # Saved cursors let the jobs resume on next load
+
+    async def resume_jobs(self):
+        await self.bot.wait_until_ready()
+        for job_id in await self.config.massrole_jobs():
+            if job_id not in self.jobs:
+                log.info(f"Resuming massrole job {job_id}")
+                self.start_job(job_id)
+
+    def start_job(self, job_id: str):
+        self.jobs[job_id] = asyncio.create_task(self.run_job(job_id))
+
+    async def run_job(self, job_id: str):
+        try:
+            await self.run_massrole_job(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception(f"Massrole job {job_id} failed")
+            await self.finish_job(job_id, f"Job `{job_id}` stopped with an error.")
+        finally:
+            self.jobs.pop(job_id, None)
+
+    async def finish_job(self, job_id: str, text: str):
+        job = await self.config.massrole_jobs.get_raw(job_id, default=None)
+        await self.config.massrole_jobs.clear_raw(job_id)
+        if job is not None:
+            await self.edit_progress(job, text)
+
+    async def edit_progress(self, job: dict, text: str):
+        channel = self.bot.get_channel(job["channel_id"])
+        if channel is None:
+            return
+        try:
+            await channel.get_partial_message(job["message_id"]).edit(content=text)
+        except discord.HTTPException:
+            pass
+
+    async def iter_member_batches(self, guild: discord.Guild, after: int = 0, size: int = MEMBER_BATCH):
+        """Yield the guild's members with ID above `after` in ID order, `size` at a time.
+
+        A fully chunked guild is served from the member cache. Otherwise the
+        members are paged from the API, so the whole guild is covered even with
+        a cold or disabled member cache and only one batch is held at a time.
+        """
+        if guild.chunked:
+            members = sorted((m for m in guild.members if m.id > after), key=lambda m: m.id)
+            for i in range(0, len(members), size):
+                yield members[i:i + size]
+            return
+        batch = []
+        async for member in guild.fetch_members(limit=None, after=discord.Object(id=after)):
+            batch.append(member)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def apply_role_diff(self, member: discord.Member, add=(), remove=(), reason: str = None):
+        """Give and take roles, skipping the ones the member already matches.
+
+        One or two changed roles go through add_roles/remove_roles, which only
+        touch those roles. More are applied as one member edit based on a
+        freshly fetched member, so a stale cached role list can't undo changes
+        made in the meantime. Returns (changed, API calls saved) where the
+        saving is measured against one request per requested role.
+        """
+        requested = len(set(add)) + len(set(remove))
+        current = {role for role in member.roles if not role.is_default()}
+        to_add = set(add) - current - {member.guild.default_role}
+        to_remove = set(remove) & current
+        needed = len(to_add) + len(to_remove)
+        if not needed:
+            return False, requested
+        if needed <= 2:  # A fetch plus an edit would cost as much
+            if to_add:
+                await member.add_roles(*to_add, reason=reason)
+            if to_remove:
+                await member.remove_roles(*to_remove, reason=reason)
+            return True, requested - needed
+        member = await member.guild.fetch_member(member.id)
+        current = {role for role in member.roles if not role.is_default()}
+        final = ((current | set(add)) - set(remove)) - {member.guild.default_role}
+        if final == current:
+            return False, requested - 1
+        await member.edit(roles=sorted(final), reason=reason)
+        return True, requested - 2
+
+    def parse_roles(self, guild: discord.Guild, text: str):
+        """Resolve comma separated role names, mentions or IDs. Returns (roles, unknown names)."""
+        roles, unknown = [], []
+        for name in filter(None, (part.strip() for part in (text or "").split(","))):
+            reference = name.strip("<@&>")
+            role = guild.get_role(int(reference)) if reference.isdigit() else discord.utils.get(guild.roles, name=name)
+            if role is None:
+                unknown.append(name)
+            elif role not in roles:
+                roles.append(role)
+        return roles, unknown
+
+    async def role_index(self, guild: discord.Guild) -> GuildRoleIndex:
+        """Return the guild's role index, building it from the member cache the first time.
+
+        Only used for chunked guilds; others are indexed one streamed batch at a time.
+        """
+        index = self.role_indexes.get(guild.id)
+        if index is not None:
+            return index
+        build = self.index_builds.get(guild.id)
+        if build is None:
+            build = self.index_builds[guild.id] = asyncio.create_task(self.build_role_index(guild))
+        return await asyncio.shield(build)
+
+    async def build_role_index(self, guild: discord.Guild) -> GuildRoleIndex:
+        """Build a guild's index in a worker thread, replaying member events that arrive meanwhile."""
+        pending = self.index_pending[guild.id] = []
+        try:
+            members = []
+            for i, member in enumerate(guild.members):
+                members.append((member.id, [role.id for role in member.roles]))
+                if i % INDEX_SNAPSHOT_BATCH == INDEX_SNAPSHOT_BATCH - 1:
+                    await asyncio.sleep(0)  # Let the gateway breathe while reading a large cache
+            index = await asyncio.to_thread(GuildRoleIndex.build, members)
+            for member_id, role_ids in pending:
+                if role_ids is None:
+                    index.remove_member(member_id)
+                else:
+                    index.set_member(member_id, role_ids)
+            if self.bot.get_guild(guild.id) is not None:
+                self.role_indexes[guild.id] = index
+            return index
+        finally:
+            self.index_pending.pop(guild.id, None)
+            self.index_builds.pop(guild.id, None)
+
+    def update_role_index(self, guild_id: int, member_id: int, role_ids):
+        """Apply a member change to a guild's index, or queue it while the index is built.
+
+        `role_ids` is None when the member left.
+        """
+        index = self.role_indexes.get(guild_id)
+        if index is None:
+            if guild_id in self.index_pending:
+                self.index_pending[guild_id].append((member_id, role_ids))
+        elif role_ids is None:
+            index.remove_member(member_id)
+        else:
+            index.set_member(member_id, role_ids)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            self.update_role_index(after.guild.id, after.id, [role.id for role in after.roles])
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.update_role_index(member.guild.id, member.id, [role.id for role in member.roles])
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self.update_role_index(member.guild.id, member.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        index = self.role_indexes.get(role.guild.id)
+        if index is not None:
+            index.remove_role(role.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.role_indexes.pop(guild.id, None)
+
+    async def run_massrole_job(self, job_id: str):
+        """Apply a massrole job in batches from its saved cursor.
+
+        The cursor is the highest member ID already handled; it is saved after
+        every batch, so a restarted job continues from there.
+        """
+        job = await self.config.massrole_jobs.get_raw(job_id)
+        guild = self.bot.get_guild(job["guild_id"])
+        role = guild.get_role(job["role_id"]) if guild else None
+        if role is None:
+            return await self.finish_job(job_id, f"Job `{job_id}` stopped: the role or server no longer exists.")
+        give = job["action"] == "give"
+        total = max(guild.member_count or 0, job["processed"])
+        semaphore = asyncio.Semaphore(MASSROLE_CONCURRENCY)
+
+        async def apply(member: discord.Member) -> str:
+            if (role in member.roles) == give:
+                return "skipped"
+            async with semaphore:
+                try:
+                    if give:
+                        await member.add_roles(role, reason=f"massrole job {job_id}")
+                    else:
+                        await member.remove_roles(role, reason=f"massrole job {job_id}")
+                except discord.HTTPException:
+                    return "failed"
+            return "changed"
+
+        started = time.monotonic()
+        last_progress = 0
+        done = 0
+        async for batch in self.iter_member_batches(guild, job["cursor"], MASSROLE_BATCH):
+            outcomes = await asyncio.gather(*(apply(member) for member in batch))
+            job["cursor"] = batch[-1].id
+            job["processed"] += len(batch)
+            job["changed"] += outcomes.count("changed")
+            job["failed"] += outcomes.count("failed")
+            await self.config.massrole_jobs.set_raw(job_id, value=job)
+            done += len(batch)
+
+            if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                rate = done / max(last_progress - started, 0.001)
+                eta = int(max(total - job["processed"], 0) / rate) if rate else 0
+                await self.edit_progress(
+                    job,
+                    f"Job `{job_id}`: {job['processed']}/{total} members checked, "
+                    f"{job['changed']} changed, {job['failed']} failed. ETA {eta // 60}m {eta % 60}s.",
+                )
+
+        verb = "Gave" if give else "Removed"
+        await self.finish_job(
+            job_id,
+            f"Job `{job_id}` done. {verb} {role.name} {'to' if give else 'from'} {job['changed']} members "
+            f"({job['failed']} failed).",
+        )
 
     async def sync_slash_commands(self):
-        self.tree.clear_commands(guild=None)  # Clear old commands
-        self.tree.add_command(self.assignrole)
-        self.tree.add_command(self.unassignrole)
-        self.tree.add_command(self.assignmultirole)
-        self.tree.add_command(self.unassignmultirole)
-        self.tree.add_command(self.massrole)
-        self.tree.add_command(self.roleif)
+        """Add the role commands to the tree, syncing only when their signatures changed."""
+        own = [self.assignrole, self.unassignrole, self.assignmultirole, self.unassignmultirole, self.editroles, self.massrole, self.massrolecancel, self.roleif]
+        sync = self.bot.get_cog("AppCommandSync")
+        if sync is not None:
+            await sync.sync(own)
+            return
+        # Without the shared signatures there's no telling what Discord has, so always sync.
+        for command in own:
+            self.tree.add_command(command, override=True)
         await self.tree.sync()
 
     @app_commands.command(name="assignrole", description="Assigns a role to a user.")
@@ -50,8 +312,10 @@ class RoleManager(commands.Cog):
         roles = [role for role in [role1, role2, role3, role4, role5, role6] if role]
         if not roles:
             return await interaction.response.send_message("No valid roles provided.", ephemeral=True)
-        await user.add_roles(*roles)
-        await interaction.response.send_message(f"Assigned {', '.join([role.name for role in roles])} to {user.display_name}.", ephemeral=True)
+        changed, saved = await self.apply_role_diff(user, add=roles)
+        if not changed:
+            return await interaction.response.send_message(f"{user.display_name} already has those roles.", ephemeral=True)
+        await interaction.response.send_message(f"Assigned {', '.join([role.name for role in roles])} to {user.display_name} ({saved} API calls saved).", ephemeral=True)
 
     @app_commands.command(name="unassignmultirole", description="Removes multiple roles from a user (max 6).")
     @app_commands.describe(
@@ -68,36 +332,153 @@ class RoleManager(commands.Cog):
         roles = [role for role in [role1, role2, role3, role4, role5, role6] if role]
         if not roles:
             return await interaction.response.send_message("No valid roles provided.", ephemeral=True)
-        await user.remove_roles(*roles)
-        await interaction.response.send_message(f"Removed {', '.join([role.name for role in roles])} from {user.display_name}.", ephemeral=True)
+        changed, saved = await self.apply_role_diff(user, remove=roles)
+        if not changed:
+            return await interaction.response.send_message(f"{user.display_name} has none of those roles.", ephemeral=True)
+        await interaction.response.send_message(f"Removed {', '.join([role.name for role in roles])} from {user.display_name} ({saved} API calls saved).", ephemeral=True)
+
+    @app_commands.command(name="editroles", description="Add and remove several roles on a user in one edit.")
+    @app_commands.describe(
+        user="User to edit",
+        add="Comma separated roles to add",
+        remove="Comma separated roles to remove",
+    )
+    async def editroles(self, interaction: discord.Interaction, user: discord.Member, add: str = None, remove: str = None):
+        """Add and remove roles on a user with a single member edit."""
+        to_add, unknown = self.parse_roles(interaction.guild, add)
+        to_remove, unknown_remove = self.parse_roles(interaction.guild, remove)
+        unknown += unknown_remove
+        if unknown:
+            return await interaction.response.send_message(f"Unknown roles: {', '.join(unknown)}.", ephemeral=True)
+        if not to_add and not to_remove:
+            return await interaction.response.send_message("No roles to add or remove.", ephemeral=True)
+        if set(to_add) & set(to_remove):
+            return await interaction.response.send_message("A role can't be both added and removed.", ephemeral=True)
+        try:
+            changed, saved = await self.apply_role_diff(user, add=to_add, remove=to_remove)
+        except discord.HTTPException as e:
+            return await interaction.response.send_message(f"Could not edit {user.display_name}'s roles: {e}", ephemeral=True)
+        if not changed:
+            return await interaction.response.send_message(f"{user.display_name}'s roles already match.", ephemeral=True)
+        summary = []
+        if to_add:
+            summary.append(f"added {', '.join(role.name for role in to_add)}")
+        if to_remove:
+            summary.append(f"removed {', '.join(role.name for role in to_remove)}")
+        await interaction.response.send_message(
+            f"Edited {user.display_name}: {'; '.join(summary)} ({saved} API calls saved).", ephemeral=True
+        )
 
     @app_commands.command(name="massrole", description="Give or remove a role from all members.")
     async def massrole(self, interaction: discord.Interaction, role: discord.Role, action: str):
-        """Give or remove a role from all members."""
+        """Give or remove a role from all members, as a background job."""
         if action.lower() not in ["give", "remove"]:
             return await interaction.response.send_message("Invalid action. Use 'give' or 'remove'.", ephemeral=True)
-        guild = interaction.guild
-        members = guild.members
-        if action.lower() == "give":
-            for member in members:
-                if role not in member.roles:
-                    await member.add_roles(role)
-            await interaction.response.send_message(f"Gave {role.name} to all members.")
-        else:
-            for member in members:
-                if role in member.roles:
-                    await member.remove_roles(role)
-            await interaction.response.send_message(f"Removed {role.name} from all members.")
+        await interaction.response.defer()
+        job_id = secrets.token_hex(4)
+        progress = await interaction.channel.send(f"Job `{job_id}`: starting {action.lower()} {role.name}...")
+        await self.config.massrole_jobs.set_raw(job_id, value={
+            "guild_id": interaction.guild.id,
+            "role_id": role.id,
+            "action": action.lower(),
+            "channel_id": progress.channel.id,
+            "message_id": progress.id,
+            "cursor": 0,
+            "processed": 0,
+            "changed": 0,
+            "failed": 0,
+        })
+        self.start_job(job_id)
+        await interaction.followup.send(
+            f"Started job `{job_id}`. Progress is posted above; cancel with `/massrolecancel {job_id}`."
+        )
+
+    @app_commands.command(name="massrolecancel", description="Cancel a running massrole job.")
+    @app_commands.describe(job_id="The job ID shown when the job started")
+    async def massrolecancel(self, interaction: discord.Interaction, job_id: str):
+        """Cancel a running massrole job."""
+        job = await self.config.massrole_jobs.get_raw(job_id, default=None)
+        if job is None or job["guild_id"] != interaction.guild.id:
+            return await interaction.response.send_message("No such job in this server.", ephemeral=True)
+        task = self.jobs.pop(job_id, None)
+        if task is not None:
+            task.cancel()
+        await self.finish_job(job_id, f"Job `{job_id}` cancelled after {job['processed']} members.")
+        await interaction.response.send_message(f"Cancelled job `{job_id}`.", ephemeral=True)
 
-    @app_commands.command(name="roleif", description="Gives roles if a user has a specific role.")
-    async def roleif(self, interaction: discord.Interaction, base_role: discord.Role, roles: str):
-        """Assign roles if a user has a specific role."""
+    @app_commands.command(name="roleif", description="Gives roles to members matching a role or a role query.")
+    @app_commands.describe(
+        roles="Comma separated role names to give (max 6)",
+        base_role="Only members with this role",
+        query='Role query, e.g. "A and B and not C" or "(A or B), not C"',
+    )
+    async def roleif(self, interaction: discord.Interaction, roles: str, base_role: discord.Role = None, query: str = None):
+        """Assign roles to members who have a role or match a role query."""
+        guild = interaction.guild
         role_list = [role.strip() for role in roles.split(",")][:6]
-        discord_roles = [discord.utils.get(interaction.guild.roles, name=role) for role in role_list]
+        discord_roles = [discord.utils.get(guild.roles, name=role) for role in role_list]
         discord_roles = [role for role in discord_roles if role]
         if not discord_roles:
             return await interaction.response.send_message("No valid roles found.", ephemeral=True)
-        for member in interaction.guild.members:
-            if base_role in member.roles:
-                await member.add_roles(*discord_roles)
-        await interaction.response.send_message(f"Assigned {', '.join([role.name for role in discord_roles])} to members with {base_role.name}.")
+        if base_role is None and query is None:
+            return await interaction.response.send_message("Give a base role, a query, or both.", ephemeral=True)
+
+        def resolve_role(name: str) -> int:
+            reference = name.strip("<@&>")
+            role = guild.get_role(int(reference)) if reference.isdigit() else None
+            if role is None:
+                role = discord.utils.get(guild.roles, name=name) or discord.utils.find(
+                    lambda r: r.name.lower() == name.lower(), guild.roles
+                )
+            if role is None:
+                raise ValueError(f"No role named `{name}`.")
+            return role.id
+
+        def select(index: GuildRoleIndex):
+            """Return (members matching, members matching but missing a target role) as bitsets."""
+            matched = index.all
+            if base_role is not None:
+                matched &= index.bits(base_role.id)
+            if query is not None:
+                matched &= evaluate_query(query, index, resolve_role)
+            have_all = index.all
+            for role in discord_roles:
+                have_all &= index.bits(role.id)
+            return matched, matched & ~have_all
+
+        try:
+            select(GuildRoleIndex())  # Check the query before starting
+        except ValueError as e:
+            return await interaction.response.send_message(str(e), ephemeral=True)
+        await interaction.response.defer()
+
+        async def apply(members):
+            nonlocal changed, failed, saved
+            for member in members:
+                try:
+                    edited, calls_saved = await self.apply_role_diff(member, add=discord_roles)
+                    changed += edited
+                    saved += calls_saved
+                except discord.HTTPException:
+                    failed += 1
+
+        matched_count = changed = failed = saved = 0
+        if guild.chunked:
+            index = await self.role_index(guild)
+            matched, targets = select(index)
+            matched_count += bin(matched).count("1")
+            await apply([m for m in map(guild.get_member, index.members_in(targets)) if m is not None])
+        else:
+            async for batch in self.iter_member_batches(guild):
+                index = GuildRoleIndex.build((m.id, [role.id for role in m.roles]) for m in batch)
+                matched, targets = select(index)
+                matched_count += bin(matched).count("1")
+                by_id = {member.id: member for member in batch}
+                await apply([by_id[member_id] for member_id in index.members_in(targets)])
+
+        matching = " and ".join(([base_role.name] if base_role else []) + ([f"`{query}`"] if query else []))
+        await interaction.followup.send(
+            f"Assigned {', '.join([role.name for role in discord_roles])} to {changed} members "
+            f"matching {matching} ({matched_count - changed - failed} already had them, {failed} failed, "
+            f"{saved} API calls saved)."
+        )
@@ -1,10 +1,20 @@
+import asyncio
+import io
+import time
+
 import discord
 from discord import app_commands
 from redbot.core import commands
 from redbot.core.bot import Red
+from redbot.core.utils.chat_formatting import pagify
 
-ALLOWED_GLOBAL_IDS = {1174820638997872721, 1274438209715044415, 690239097150767153}
+ALLOWED_GLOBAL_IDS = frozenset({1174820638997872721, 1274438209715044415, 690239097150767153})
 APPEAL_LINK = "https://forms.gle/gR6f9iaaprASRgyP9"
+FAN_OUT_CONCURRENCY = 5
+PROGRESS_EDIT_INTERVAL = 2  # seconds between progress message edits
+REPORT_FILE_THRESHOLD = 6000  # characters; longer reports are attached as a file
+
+
 
 class ServerBan(commands.Cog):
     """Force-ban or unban users by ID with global option and appeal messaging."""
@@ -12,12 +22,118 @@ class ServerBan(commands.Cog):
     def __init__(self, bot: Red):
         self.bot = bot
         self.tree = bot.tree  # Ensure slash commands are in sync
+        self.ban_cache = {}  # guild ID -> set of banned user IDs, for guilds with a warmed cache
+
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild: discord.Guild, user: discord.User):
+        if guild.id in self.ban_cache:
+            self.ban_cache[guild.id].add(user.id)
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild: discord.Guild, user: discord.User):
+        if guild.id in self.ban_cache:
+            self.ban_cache[guild.id].discard(user.id)
+
+    async def cog_load(self):
+        self.register_access()
+
+    def cog_unload(self):
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            access.unregister("global")
+
+    def register_access(self):
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            access.register("global", ALLOWED_GLOBAL_IDS)
+
+    @commands.Cog.listener()
+    async def on_cog_add(self, cog):
+        if cog.qualified_name == "AccessControl":
+            self.register_access()
+
+    def is_global_allowed(self, user_id: int) -> bool:
+        """Whether a user may run global actions, checked through AccessControl when it is loaded."""
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            return access.is_allowed(user_id, "global")
+        return user_id in ALLOWED_GLOBAL_IDS
+
+    async def is_banned(self, guild: discord.Guild, user_id: int) -> bool:
+        """Check one user's ban with the cache, or a single ban lookup."""
+        if guild.id in self.ban_cache:
+            return user_id in self.ban_cache[guild.id]
+        try:
+            await guild.fetch_ban(discord.Object(id=user_id))
+        except discord.NotFound:
+            return False
+        return True
+
+    @commands.command()
+    @commands.is_owner()
+    async def sbancache(self, ctx, enabled: bool):
+        """Keep an in-memory list of each server's bans for sban checks.
+
+        Warming reads every server's ban list once; ban and unban events keep it current.
+        """
+        if not enabled:
+            self.ban_cache.clear()
+            return await ctx.send("Ban cache disabled.")
+        async with ctx.typing():
+            for guild in self.bot.guilds:
+                try:
+                    self.ban_cache[guild.id] = {entry.user.id async for entry in guild.bans(limit=None)}
+                except discord.HTTPException:
+                    self.ban_cache.pop(guild.id, None)  # Falls back to per-user lookups
+        await ctx.send(f"Ban cache warmed for {len(self.ban_cache)} of {len(self.bot.guilds)} servers.")
+
+    async def fan_out(self, interaction: discord.Interaction, guilds, action, verb: str):
+        """Run `action` on every guild with bounded concurrency.
+
+        One progress message is edited in place as guilds complete. Returns
+        the result lines in completion order.
+        """
+        semaphore = asyncio.Semaphore(FAN_OUT_CONCURRENCY)
+
+        async def run(guild):
+            async with semaphore:
+                return await action(guild)
+
+        progress = await interaction.followup.send(f"{verb} in 0/{len(guilds)} servers...", wait=True)
+        results = []
+        last_edit = time.monotonic()
+        for finished in asyncio.as_completed([run(guild) for guild in guilds]):
+            results.append(await finished)
+            if time.monotonic() - last_edit >= PROGRESS_EDIT_INTERVAL or len(results) == len(guilds):
+                last_edit = time.monotonic()
+                try:
+                    await progress.edit(content=f"{verb} in {len(results)}/{len(guilds)} servers...")
+                except discord.HTTPException:
+                    pass
+        return results
+
+    async def send_report(self, interaction: discord.Interaction, lines, filename: str):
+        """Send result lines as one message, a few chunks, or a file when long."""
+        report = "\n".join(lines)
+        if len(report) > REPORT_FILE_THRESHOLD:
+            await interaction.followup.send(
+                f"{len(lines)} results attached.",
+                file=discord.File(io.BytesIO(report.encode("utf-8")), filename=filename),
+            )
+            return
+        for page in pagify(report, page_length=2000):
+            await interaction.followup.send(page)
 
     async def sync_slash_commands(self):
-        """Sync all slash commands."""
-        self.tree.clear_commands(guild=None)  # Clear old commands
-        self.tree.add_command(self.sban)
-        self.tree.add_command(self.sunban)
+        """Register sban/sunban and sync the tree only if Discord's copy is out of date."""
+        own = [self.sban, self.sunban]
+        sync = self.bot.get_cog("AppCommandSync")
+        if sync is not None:
+            await sync.sync(own)
+            return
+        # Without the shared signatures there's no telling what Discord has, so always sync.
+        for command in own:
+            self.tree.add_command(command, override=True)
         await self.tree.sync()
 
     @app_commands.command(name="sban", description="Ban a user by ID with optional global effect and DM appeal info.")
@@ -43,7 +159,7 @@ class ServerBan(commands.Cog):
         # Convert is_global to boolean from string (Yes = True, No = False)
         is_global = True if is_global.lower() == 'yes' else False
 
-        if is_global and moderator.id not in ALLOWED_GLOBAL_IDS:
+        if is_global and not self.is_global_allowed(moderator.id):
             return await interaction.followup.send("You are not authorized to use global bans.")
 
         target_guilds = self.bot.guilds if is_global else [interaction.guild]
@@ -67,75 +183,114 @@ class ServerBan(commands.Cog):
         except discord.HTTPException:
             await interaction.followup.send("Could not DM the user, but proceeding with the ban.")
 
-        ban_errors = []  # List to store errors if any occur during banning
-
-        for guild in target_guilds:
+        async def ban_in(guild: discord.Guild) -> str:
             try:
-                is_banned = False
-                async for entry in guild.bans():
-                    if entry.user.id == user_id:
-                        is_banned = True
-                        break
-                if is_banned:
-                    ban_errors.append(f"User is already banned in {guild.name}.")
-                    continue
-
+                if await self.is_banned(guild, user_id):
+                    return f"User is already banned in {guild.name}."
                 await guild.ban(discord.Object(id=user_id), reason=reason)
-                ban_errors.append(f"Banned {user_id} in {guild.name}.")
+                return f"Banned {user_id} in {guild.name}."
             except Exception as e:
-                ban_errors.append(f"Failed to ban in {guild.name}: {e}")
+                return f"Failed to ban in {guild.name}: {e}"
 
-        # Send a final response only once, containing all the errors and successes
-        if ban_errors:
-            await interaction.followup.send("\n".join(ban_errors))
+        if len(target_guilds) == 1:
+            results = [await ban_in(target_guilds[0])]
         else:
-            # Make sure we indicate the global status in the final message
-            global_status = "globally" if is_global else "locally"
-            await interaction.followup.send(f"User {user_id} banned {global_status} in all target servers.")
+            results = await self.fan_out(interaction, target_guilds, ban_in, "Banning")
+
+        # One final report with all the errors and successes, chunked or attached if long
+        global_status = "globally" if is_global else "locally"
+        header = f"Results for banning {user_id} {global_status}:"
+        await self.send_report(interaction, [header, *results], f"sban-{user_id}.txt")
 
     @app_commands.command(name="sunban", description="Unban a user and send them an invite link, trying to use past DMs first.")
-    @app_commands.describe(user_id="The ID of the user to unban", reason="Reason for unbanning the user")
-    async def sunban(self, interaction: discord.Interaction, user_id: str, reason: str = "Your application has been accepted, you can now rejoin the server using the previous link or by requesting it with the button below"):
+    @app_commands.describe(
+        user_id="The ID of the user to unban",
+        reason="Reason for unbanning the user",
+        is_global="Unban in every server the bot is in",
+    )
+    @app_commands.choices(
+        is_global=[
+            app_commands.Choice(name="Yes", value="yes"),
+            app_commands.Choice(name="No", value="no")
+        ]
+    )
+    async def sunban(self, interaction: discord.Interaction, user_id: str, reason: str = "Your application has been accepted, you can now rejoin the server using the previous link or by requesting it with the button below", is_global: str = "no"):
         """Unban a user and send them an invite link, trying to use past DMs first."""
         try:
             user_id = int(user_id)  # Convert user_id to an integer
         except ValueError:
             return await interaction.response.send_message("Please provide a valid user ID as an integer.")
 
-        guild = interaction.guild
-        invite = await guild.text_channels[0].create_invite(max_uses=1, unique=True)
+        await interaction.response.defer()
 
-        try:
-            # Try to unban the user directly without iterating through the bans list
-            await guild.unban(discord.Object(id=user_id), reason=reason)
+        is_global = is_global.lower() == "yes"
+        if is_global and not self.is_global_allowed(interaction.user.id):
+            return await interaction.followup.send("You are not authorized to use global unbans.")
 
-            # If no error occurred, proceed to send DM to the user
+        target_guilds = self.bot.guilds if is_global else [interaction.guild]
+        rejoin = []  # (guild, invite) for every guild the user was unbanned from
+
+        async def unban_in(guild: discord.Guild) -> str:
             try:
-                user = await self.bot.fetch_user(user_id)
-                channel = user.dm_channel or await user.create_dm()
-
-                embed = discord.Embed(
-                    title="You have been unbanned",
-                    description=f"**Reason:** {reason}\n\n"
-                                f"**Server:** {guild.name}\n\n"
-                                "Click the button below to rejoin the server.",
-                    color=discord.Color.green()
-                )
-                view = discord.ui.View()
-                button = discord.ui.Button(label="Rejoin Server", url=invite.url, style=discord.ButtonStyle.link)
-                view.add_item(button)
-
-                await channel.send(embed=embed, view=view)
+                await guild.unban(discord.Object(id=user_id), reason=reason)
             except discord.NotFound:
-                await interaction.response.send_message("User not found. They may have deleted their account.")
+                return f"User is not banned in {guild.name}."
             except discord.Forbidden:
-                await interaction.response.send_message("Could not DM the user.")
+                return f"No permission to unban in {guild.name}."
+            except discord.HTTPException as e:
+                return f"Failed to unban in {guild.name}: {e}"
+            # Only create an invite once the unban has gone through
+            invite = await self.create_invite(guild, reason=f"Rejoin invite for {user_id}")
+            rejoin.append((guild, invite))
+            return f"Unbanned {user_id} in {guild.name}." + ("" if invite else " Could not create an invite.")
+
+        if len(target_guilds) == 1:
+            results = [await unban_in(target_guilds[0])]
+        else:
+            results = await self.fan_out(interaction, target_guilds, unban_in, "Unbanning")
 
-            await interaction.response.send_message(f"User with ID {user_id} has been unbanned from {guild.name}.")
+        if rejoin:
+            results.append(await self.send_unban_dm(user_id, reason, rejoin))
+        await self.send_report(interaction, results, f"sunban-{user_id}.txt")
 
+    async def create_invite(self, guild: discord.Guild, reason: str = None):
+        """Get a single-use invite from the InvitePool cog, or create one. Returns None on failure."""
+        pool = self.bot.get_cog("InvitePool")
+        if pool is not None:
+            return await pool.take(guild, reason=reason)
+        channel = next(
+            (c for c in guild.text_channels if c.permissions_for(guild.me).create_instant_invite), None
+        )
+        if channel is None:
+            return None
+        try:
+            return await channel.create_invite(max_uses=1, unique=True, reason=reason)
+        except discord.HTTPException:
+            return None
+
+    async def send_unban_dm(self, user_id: int, reason: str, rejoin) -> str:
+        """DM the user once, listing every server they can rejoin. Returns a status line."""
+        invites = [(guild, invite) for guild, invite in rejoin if invite]
+        servers = "\n".join(
+            f"[{guild.name}]({invite.url})" if invite else guild.name for guild, invite in rejoin
+        )
+        embed = discord.Embed(
+            title="You have been unbanned",
+            description=f"**Reason:** {reason}\n\n"
+                        f"**Servers:**\n{servers}"[:4000] + "\n\n"
+                        "Click the buttons below to rejoin.",
+            color=discord.Color.green()
+        )
+        view = discord.ui.View()
+        for guild, invite in invites[:25]:  # Discord allows 25 buttons per message
+            view.add_item(discord.ui.Button(label=f"Rejoin {guild.name}"[:80], url=invite.url, style=discord.ButtonStyle.link))
+
+        try:
+            user = await self.bot.fetch_user(user_id)
+            channel = user.dm_channel or await user.create_dm()
+            await channel.send(embed=embed, view=view)
         except discord.NotFound:
-            await interaction.response.send_message("The user is not banned.")
-        except discord.Forbidden:
-            await interaction.response.send_message("I do not have permission to unban this user.")
-        except Exception as e:
-            await interaction.response.send_message(f"An error occurred while unbanning: {e}")
+            return "User not found. They may have deleted their account."
+        except discord.HTTPException:
+            return "Could not DM the user."
+        return f"Sent the user invites for {len(invites)} servers."
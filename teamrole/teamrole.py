@@ -1,6 +1,7 @@
 import discord
 import asyncio
 from redbot.core import commands, Config
+from redbot.core.utils.chat_formatting import box, pagify
 from redbot.core.utils.predicates import MessagePredicate, ReactionPredicate
 from redbot.core.utils.menus import start_adding_reactions
 
@@ -15,6 +16,27 @@ class TeamRole(commands.Cog):
         self.bot = bot
         self.config = Config.get_conf(self, identifier=78631109)
         self.config.register_global(team_users=[])
+        self.team_ids = set()  # in-memory copy of team_users, written through by add/remove/wipe
+
+    async def cog_load(self):
+        self.team_ids = set(await self.config.team_users())
+        self.register_access()
+
+    def cog_unload(self):
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            access.unregister("team")
+
+    def register_access(self):
+        """Share the team list with AccessControl, which runs the membership check"""
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            access.register("team", self.team_ids)
+
+    @commands.Cog.listener()
+    async def on_cog_add(self, cog):
+        if cog.qualified_name == "AccessControl":
+            self.register_access()
 
     async def red_delete_data_for_user(self, **kwargs):
         """No data to delete"""
@@ -28,8 +50,56 @@ class TeamRole(commands.Cog):
         """Check if user is owner or in team list"""
         if await self.bot_owner_check(ctx):
             return True
-        team_users = await self.config.team_users()
-        return ctx.author.id in team_users
+        access = self.bot.get_cog("AccessControl")
+        if access is not None:
+            return access.is_allowed(ctx.author.id, "team")
+        return ctx.author.id in self.team_ids
+
+    async def sync_member(self, member, users):
+        """Grant or revoke the team role so it matches the team list for one member"""
+        role = discord.utils.get(member.guild.roles, name=self.role_name)
+        if not role or (role in member.roles) == (member.id in users):
+            return
+        try:
+            if member.id in users:
+                await member.add_roles(role, reason="Team list sync")
+            else:
+                await member.remove_roles(role, reason="Team list sync")
+        except discord.HTTPException:
+            pass
+
+    async def sync_guild(self, guild, users):
+        """Sync only the members whose team role doesn't match the team list"""
+        role = discord.utils.get(guild.roles, name=self.role_name)
+        if not role:
+            return False
+        current_members = {m.id for m in role.members}
+        for uid in current_members ^ set(users):
+            member = guild.get_member(uid)
+            if member:
+                await self.sync_member(member, users)
+        return True
+
+    async def sync_user(self, user_id):
+        """Sync one user's team role in every server they share with the bot"""
+        for guild in self.bot.guilds:
+            member = guild.get_member(user_id)
+            if member:
+                await self.sync_member(member, self.team_ids)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        await self.sync_member(member, self.team_ids)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.sync_guild(guild, self.team_ids)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        # Only react when someone else gave or took the team role
+        if any(r.name == self.role_name for r in set(before.roles) ^ set(after.roles)):
+            await self.sync_member(after, self.team_ids)
 
     @commands.group()
     @commands.check(lambda ctx: ctx.cog.team_member_check(ctx))
@@ -109,22 +179,24 @@ class TeamRole(commands.Cog):
     async def add(self, ctx, user: discord.User):
         """Add user to the team list"""
         async with self.config.team_users() as users:
-            if user.id not in users:
-                users.append(user.id)
-                await ctx.send(f"Added {user.mention} to team list")
-            else:
-                await ctx.send("User already in team list")
+            if user.id in users:
+                return await ctx.send("User already in team list")
+            users.append(user.id)
+        self.team_ids.add(user.id)
+        await self.sync_user(user.id)
+        await ctx.send(f"Added {user.mention} to team list")
 
     @team.command()
     @commands.is_owner()
     async def remove(self, ctx, user: discord.User):
         """Remove user from the team list"""
         async with self.config.team_users() as users:
-            if user.id in users:
-                users.remove(user.id)
-                await ctx.send(f"Removed {user.mention} from team list")
-            else:
-                await ctx.send("User not in team list")
+            if user.id not in users:
+                return await ctx.send("User not in team list")
+            users.remove(user.id)
+        self.team_ids.discard(user.id)
+        await self.sync_user(user.id)
+        await ctx.send(f"Removed {user.mention} from team list")
 
     @team.command()  
     @commands.is_owner()
@@ -149,6 +221,7 @@ class TeamRole(commands.Cog):
              if pred.result == 0:  
                  await ctx.send("Wiping all data...")  
                  await self.config.team_users.set([])  
+                 self.team_ids.clear()
                  
                  deleted = 0  
                  for guild in self.bot.guilds:  
@@ -254,66 +327,68 @@ class TeamRole(commands.Cog):
                     pass
         await ctx.send("Message sent to all team members!")
 
+    async def position_team_role(self, guild, role):
+        """Move the team role directly below the bot's top role with one bulk request.
+
+        Returns False if it was already there and None if it sits at or above
+        the bot's top role, where the bot can't move it.
+        """
+        bot_top = guild.me.top_role
+        ordered = sorted(guild.roles)
+        if ordered.index(bot_top) - ordered.index(role) == 1:
+            return False
+        if role >= bot_top:
+            return None
+        ordered.remove(role)
+        ordered.insert(ordered.index(bot_top), role)
+        # Only roles below ours can be moved, and only those whose position changes are sent
+        positions = {
+            r: position for position, r in enumerate(ordered)
+            if position != r.position and r < bot_top and not r.is_default()
+        }
+        await guild.edit_role_positions(positions=positions, reason="Team role update")
+        return True
+
     @team.command()
     @commands.check(lambda ctx: ctx.cog.team_member_check(ctx))
     async def update(self, ctx):
-        """Update team roles across all servers"""  
-        team_users = await self.config.team_users()  
-        msg = await ctx.send("Starting global role update...")  
-        
-        success = errors = 0  
-        for guild in self.bot.guilds:  
-            try:  
-                role = discord.utils.get(guild.roles, name=self.role_name)  
-                if not role:  
-                    errors += 1  
-                    continue  
-                
-                # Get bot's top role in this guild  
-                bot_top = guild.me.top_role  
-                if not bot_top:  
-                    errors += 1  
-                    continue  
-
-                # Get all roles to sort  
-                roles = guild.roles  
-                
-                # Find the position just below bot's top role  
-                bot_pos = bot_top.position  
-                new_pos = bot_pos - 1  
-                
-                # Ensure team role is below bot's top role  
-                if role.position != new_pos:  
-                    # Move all necessary roles up to make space  
-                    sorted_roles = sorted(roles, key=lambda r: r.position, reverse=True)  
-                    for r in sorted_roles:  
-                        if r.position < bot_pos and r != role:  
-                            try:  
-                                await r.edit(position=r.position + 1)  
-                            except:  
-                                pass  
-                    await role.edit(position=new_pos)  
-                
-                # Sync members  
-                current_members = {m.id for m in role.members}  
-                to_remove = current_members - set(team_users)  
-                to_add = set(team_users) - current_members  
-                
-                for uid in to_remove:  
-                    member = guild.get_member(uid)  
-                    if member:  
-                        await member.remove_roles(role)  
-                
-                for uid in to_add:  
-                    member = guild.get_member(uid)  
-                    if member:  
-                        await member.add_roles(role)  
-                
-                success += 1  
-            except:  
-                errors += 1  
-        
-        await msg.edit(content=f"Updated {success} servers. Errors: {errors}")  
+        """Reconcile team roles across all servers
+
+        The listeners keep membership in sync as things happen, so this is only
+        needed occasionally, e.g. after downtime.
+        """
+        team_users = await self.config.team_users()
+        msg = await ctx.send("Starting global role update...")
+
+        success = errors = moved = 0
+        report = []
+        for guild in self.bot.guilds:
+            try:
+                role = discord.utils.get(guild.roles, name=self.role_name)
+                if not role:
+                    errors += 1
+                    report.append(f"{guild.name}: no team role")
+                    continue
+
+                try:
+                    placed = await self.position_team_role(guild, role)
+                except discord.HTTPException:
+                    placed = None
+                if placed:
+                    moved += 1
+                placement = {True: "moved", False: "already in place", None: "could not move"}[placed]
+
+                await self.sync_guild(guild, team_users)
+
+                report.append(f"{guild.name}: {placement}")
+                success += 1
+            except:
+                errors += 1
+                report.append(f"{guild.name}: error")
+
+        await msg.edit(content=f"Updated {success} servers, moved the role in {moved}. Errors: {errors}")
+        for page in pagify("\n".join(report)):
+            await ctx.send(box(page))
 
 
     @team.command()
@@ -321,14 +396,25 @@ class TeamRole(commands.Cog):
     async def getinvite(self, ctx):
         """Generate single-use invites for all servers"""
         invites = []
-        for guild in self.bot.guilds:
-            try:
-                channel = next((c for c in guild.text_channels if c.permissions_for(guild.me).create_instant_invite), None)
-                if channel:
-                    invite = await channel.create_invite(max_uses=1, unique=True, reason=f"Invite by {ctx.author}")
+        pool = self.bot.get_cog("InvitePool")
+        if pool:
+            # Ready invites come straight from the pool, so no need to go server by server
+            taken = await asyncio.gather(
+                *(pool.take(guild, reason=f"Invite by {ctx.author}") for guild in self.bot.guilds),
+                return_exceptions=True,
+            )
+            for guild, invite in zip(self.bot.guilds, taken):
+                if isinstance(invite, discord.Invite):
                     invites.append(f"{guild.name}: {invite.url}")
-            except:
-                pass
+        else:
+            for guild in self.bot.guilds:
+                try:
+                    channel = next((c for c in guild.text_channels if c.permissions_for(guild.me).create_instant_invite), None)
+                    if channel:
+                        invite = await channel.create_invite(max_uses=1, unique=True, reason=f"Invite by {ctx.author}")
+                        invites.append(f"{guild.name}: {invite.url}")
+                except:
+                    pass
         
         try:
             await ctx.author.send("**Server Invites:**\n" + "\n".join(invites))
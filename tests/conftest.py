@@ -0,0 +1,170 @@
+"""Minimal stand-ins for discord.py and Red so cog logic can run without a bot.
+
+Only what the tested code paths touch is provided.
+"""
+import copy
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _install_discord():
+    discord = types.ModuleType("discord")
+
+    class HTTPException(Exception):
+        pass
+
+    class NotFound(HTTPException):
+        pass
+
+    class Forbidden(HTTPException):
+        pass
+
+    class Object:
+        def __init__(self, id):
+            self.id = id
+
+    class View:
+        def __init__(self, *args, **kwargs):
+            pass
+
+    def button(**kwargs):
+        return lambda func: func
+
+    discord.HTTPException = HTTPException
+    discord.NotFound = NotFound
+    discord.Forbidden = Forbidden
+    discord.Object = Object
+    discord.ui = types.SimpleNamespace(View=View, button=button)
+    discord.ButtonStyle = types.SimpleNamespace(secondary=None)
+    discord.AuditLogAction = types.SimpleNamespace(ban=None)
+    for name in ("Embed", "Color", "File", "User", "Interaction", "Member", "Guild", "Role", "Invite"):
+        setattr(discord, name, type(name, (), {}))
+    sys.modules["discord"] = discord
+
+
+def _passthrough(*args, **kwargs):
+    return lambda func: func
+
+
+class _Access:
+    """What calling a Config value returns: awaitable, or usable with `async with`."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        return self.value._read().__await__()
+
+    async def __aenter__(self):
+        self.current = await self.value._read()
+        return self.current
+
+    async def __aexit__(self, *exc):
+        await self.value.set(self.current)
+
+
+class _Value:
+    def __init__(self, store, key, default):
+        self.store, self.key, self.default = store, key, default
+
+    async def _read(self):
+        return copy.deepcopy(self.store.get(self.key, self.default))
+
+    def __call__(self):
+        return _Access(self)
+
+    async def set(self, value):
+        self.store[self.key] = copy.deepcopy(value)
+
+    async def clear(self):
+        self.store.pop(self.key, None)
+
+
+class _Group:
+    def __init__(self, store, defaults):
+        self._store, self._defaults = store, defaults
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Value(self._store, name, self._defaults[name])
+
+
+class Config:
+    """In-memory Config with the global and guild scopes the cogs use."""
+
+    def __init__(self):
+        self._globals, self._guild_defaults, self._guilds = {}, {}, {}
+        self._global_defaults = {}
+
+    @classmethod
+    def get_conf(cls, cog, identifier, force_registration=False, cog_name=None):
+        return cls()
+
+    def register_global(self, **defaults):
+        self._global_defaults.update(defaults)
+
+    def register_guild(self, **defaults):
+        self._guild_defaults.update(defaults)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Value(self._globals, name, self._global_defaults[name])
+
+    def guild_from_id(self, guild_id):
+        return _Group(self._guilds.setdefault(guild_id, {}), self._guild_defaults)
+
+    def guild(self, guild):
+        return self.guild_from_id(guild.id)
+
+    async def all_guilds(self):
+        return {guild_id: dict(values) for guild_id, values in self._guilds.items()}
+
+
+def _install_redbot():
+    redbot = types.ModuleType("redbot")
+    core = types.ModuleType("redbot.core")
+    commands = types.ModuleType("redbot.core.commands")
+
+    class Cog:
+        @staticmethod
+        def listener(*args, **kwargs):
+            return lambda func: func
+
+    def group(*args, **kwargs):
+        def decorator(func):
+            func.command = _passthrough
+            return func
+        return decorator
+
+    commands.Cog = Cog
+    commands.command = _passthrough
+    commands.group = group
+    commands.is_owner = _passthrough
+    commands.check = _passthrough
+    core.commands = commands
+    core.Config = Config
+
+    data_manager = types.ModuleType("redbot.core.data_manager")
+    data_manager.cog_data_path = lambda cog: Path(".")
+    utils = types.ModuleType("redbot.core.utils")
+    chat_formatting = types.ModuleType("redbot.core.utils.chat_formatting")
+    chat_formatting.box = lambda text: text
+    chat_formatting.pagify = lambda text, **kwargs: [text]
+    bot = types.ModuleType("redbot.core.bot")
+    bot.Red = object
+
+    for name, module in {
+        "redbot": redbot, "redbot.core": core, "redbot.core.commands": commands,
+        "redbot.core.data_manager": data_manager, "redbot.core.utils": utils,
+        "redbot.core.utils.chat_formatting": chat_formatting, "redbot.core.bot": bot,
+    }.items():
+        sys.modules[name] = module
+
+
+_install_discord()
+_install_redbot()
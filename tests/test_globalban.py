@@ -0,0 +1,117 @@
+import asyncio
+import types
+
+import discord
+
+from globalban.globalban import GlobalBan
+from globalban.index import BanIndex
+from globalban.storage import BanStore
+
+
+class FakeGuild:
+    def __init__(self, guild_id, bans):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self._bans = bans  # user ID -> reason
+        self.lookups_under_lock = 0
+        self.cog = None
+
+    async def fetch_ban(self, user):
+        if self.cog is not None and self.cog.ban_list_lock.locked():
+            self.lookups_under_lock += 1
+        if user.id not in self._bans:
+            raise discord.NotFound()
+        return types.SimpleNamespace(user=user, reason=self._bans[user.id])
+
+    async def bans(self, limit=None, after=None):
+        start = after.id if after else 0
+        for user_id in sorted(self._bans):
+            if user_id > start:
+                yield types.SimpleNamespace(user=types.SimpleNamespace(id=user_id), reason=self._bans[user_id])
+
+
+async def make_cog(tmp_path, guilds, rows):
+    by_id = {guild.id: guild for guild in guilds}
+    cog = GlobalBan(types.SimpleNamespace(guilds=guilds, get_guild=by_id.get))
+    for guild in guilds:
+        guild.cog = cog
+    cog.store = BanStore(tmp_path / "bans.sqlite3")
+    await cog.store.open()
+    for source, entries in rows.items():
+        await cog.store.apply(entries, source=source)
+    cog.index = BanIndex.from_dict(await cog.store.all())
+    return cog
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_rebuild_removes_only_scanned_bans_no_guild_has(tmp_path):
+    async def scenario():
+        guilds = [FakeGuild(1, {10: "spam", 30: "raid"}), FakeGuild(2, {10: "spam", 40: "new"})]
+        cog = await make_cog(tmp_path, guilds, {
+            "scan": {10: {"reason": "spam", "banned_by": "Unknown"}, 20: {"reason": "gone", "banned_by": "Unknown"}},
+            "manual": {50: {"reason": "manual", "banned_by": 7}},
+            "import": {60: {"reason": "imported", "banned_by": 7}},
+        })
+        total, incomplete = await cog.rebuild_ban_list()
+        assert incomplete == []
+        assert set(await cog.store.ids()) == {10, 30, 40, 50, 60}
+        assert set(cog.index) == {10, 30, 40, 50, 60}
+        assert total == 5
+        assert set(await cog.store.ids(source="scan")) == {10, 30, 40}
+        # State is cleared, so the next run reads every guild again.
+        for guild in guilds:
+            assert await cog.config.guild(guild).rebuild_done() is False
+            assert await cog.config.guild(guild).rebuild_bans() == {}
+        await cog.store.close()
+
+    run(scenario())
+
+
+def test_rebuild_with_nothing_to_change(tmp_path):
+    async def scenario():
+        guilds = [FakeGuild(1, {10: "spam"})]
+        cog = await make_cog(tmp_path, guilds, {"scan": {10: {"reason": "spam", "banned_by": "Unknown"}}})
+        assert await cog.rebuild_ban_list() == (1, [])
+        assert await cog.rebuild_ban_list() == (1, [])
+        await cog.store.close()
+
+    run(scenario())
+
+
+def test_rebuild_keeps_journaled_users(tmp_path):
+    async def scenario():
+        cog = await make_cog(tmp_path, [FakeGuild(1, {})], {"scan": {20: {"reason": "x", "banned_by": "Unknown"}}})
+        cog.journaled_ids.add(20)
+        await cog.rebuild_ban_list()
+        assert 20 in cog.index
+        assert cog.journaled_ids == set()
+        await cog.store.close()
+
+    run(scenario())
+
+
+def test_journal_unban_only_lifts_scanned_bans_no_other_guild_has(tmp_path):
+    async def scenario():
+        guilds = [FakeGuild(1, {70: "alt account"}), FakeGuild(2, {10: "spam"})]
+        cog = await make_cog(tmp_path, guilds, {
+            "scan": {10: {"reason": "spam", "banned_by": "Unknown"}, 20: {"reason": "old", "banned_by": "Unknown"}},
+            "manual": {50: {"reason": "manual", "banned_by": 7}},
+        })
+        await cog.config.ban_journal.set([
+            {"op": "unban", "user_id": 10, "guild_id": 1},
+            {"op": "unban", "user_id": 20, "guild_id": 1},
+            {"op": "unban", "user_id": 50, "guild_id": 1},
+            {"op": "ban", "user_id": 70, "guild_id": 1},
+        ])
+        await cog.flush_journal()
+        assert set(cog.index) == {10, 50, 70}
+        assert set(await cog.store.ids()) == {10, 50, 70}
+        assert cog.index.get(70)["reason"] == "alt account"
+        assert await cog.config.ban_journal() == []
+        assert sum(guild.lookups_under_lock for guild in guilds) == 0
+        await cog.store.close()
+
+    run(scenario())